@@ -5,7 +5,9 @@ from base64 import b64encode
 import flask
 from flask_cors import CORS
 
+import sanskrit_parser
 from sanskrit_parser.rest_api import api_v1
+from sanskrit_parser.util import metrics
 
 
 # Filter some logs to make it easier to focus on overall progress
@@ -46,5 +48,18 @@ def index():
     return flask.redirect('/ui/index.html')
 
 
+@app.route('/metrics')
+def metrics_text():
+    """ Metrics in the Prometheus text exposition format """
+    return flask.Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+
+@app.route('/_ah/warmup')
+def warmup():
+    """ App Engine warmup request: load data before traffic arrives """
+    sanskrit_parser.warmup()
+    return '', 200, {}
+
+
 if __name__ == '__main__':
     app.run(host='127.0.0.1', port=8080, debug=True)
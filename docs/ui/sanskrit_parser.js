@@ -23,7 +23,8 @@ function end_s_visarga(s) {
 function parse_split(id) {
     //split = $("#header"+id).text()
     split = $("#header"+id).attr("rawtext")
-    url = urlbase + "sanskrit_parser/v1/parse-presegmented/" + split
+    // The split and parse graphs are only returned when asked for
+    url = urlbase + "sanskrit_parser/v1/parse-presegmented/" + split + "?dot=true"
     var btn = $(this);
     var btxt = btn.text();
     btn.removeClass("btn-primary").addClass("btn-secondary");
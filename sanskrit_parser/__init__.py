@@ -16,7 +16,6 @@ Code resides at: https://github.com/kmadathil/sanskrit_parser/
 Please report any issues at: https://github.com/kmadathil/sanskrit_parser/issues
 
 """
-from .api import Parser
 import logging
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.DEBUG)
@@ -60,5 +59,32 @@ def enable_file_logger(log_file_name='SanskritParser.log',
     logger.addHandler(fh)
 
 
+def warmup():
+    '''Load heavy dependencies and shared data ahead of first use
+
+       Importing sanskrit_parser is cheap, and everything is otherwise
+       loaded on first use. Servers that would rather pay this cost at
+       startup than on their first request can call warmup().
+    '''
+    from .api import Parser  # noqa: F401
+    from .parser.sandhi_analyzer import LexicalSandhiAnalyzer
+    from .parser.datastructures import dw
+    from .util import lexical_scorer
+    from .util.sanskrit_data_wrapper import SanskritDataWrapper  # noqa: F401
+    LexicalSandhiAnalyzer.sandhi._load_forward()
+    LexicalSandhiAnalyzer.sandhi._load_backward()
+    dw._load()
+    lexical_scorer.load_models()
+
+
+def __getattr__(name):
+    # Parser is imported on first access, so that importing the package
+    # does not pull in the whole pipeline
+    if name == 'Parser':
+        from .api import Parser
+        return Parser
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 __version__ = '0.2.6'
-__all__ = ['Parser', '__version__']
+__all__ = ['Parser', '__version__', 'warmup']
@@ -51,10 +51,12 @@ from dataclasses import dataclass
 from typing import Sequence
 
 from indic_transliteration import sanscript
-from sanskrit_parser.base.sanskrit_base import SanskritNormalizedString, SanskritString
+from sanskrit_parser.base.sanskrit_base import SanskritNormalizedString, transcode
 from sanskrit_parser.base.sanskrit_base import SanskritObject
 from sanskrit_parser.parser.datastructures import VakyaGraph, VakyaGraphNode
 from sanskrit_parser.parser.sandhi_analyzer import LexicalSandhiAnalyzer
+from sanskrit_parser.util import dot
+from sanskrit_parser.util import metrics
 
 logger = logging.getLogger(__name__)
 
@@ -81,7 +83,8 @@ class Parser():
     def __init__(self, strict_io: bool = False, input_encoding: str = None,
                  output_encoding: str = sanscript.SLP1, lexical_lookup: str = "combined",
                  score: bool = True, split_above: int = 5,
-                 replace_ending_visarga: str = None, fast_merge: bool = True):
+                 replace_ending_visarga: str = None, fast_merge: bool = True,
+                 sandhi_analyzer: LexicalSandhiAnalyzer = None):
         self.strict_io = strict_io
         if input_encoding is not None:
             self.input_encoding = input_encoding
@@ -93,7 +96,11 @@ class Parser():
         self.split_above = split_above
         self.replace_ending_visarga = replace_ending_visarga
         self.fast_merge = fast_merge
-        self.sandhi_analyzer = LexicalSandhiAnalyzer(self.lexical_lookup)
+        if sandhi_analyzer is not None:
+            # Share an existing analyzer (and its lexical lookup)
+            self.sandhi_analyzer = sandhi_analyzer
+        else:
+            self.sandhi_analyzer = LexicalSandhiAnalyzer(self.lexical_lookup)
 
     def _maybe_pre_segment(self, input_string: str, pre_segmented: bool
                            ):
@@ -175,25 +182,33 @@ class Split(Serializable):
         return str(out)
 
     def parse(self, limit=10, min_cost_only=False):
+        return list(self.iter_parses(limit, min_cost_only))
+
+    def iter_parses(self, limit=10, min_cost_only=False):
+        ''' Generate Parses one at a time, so callers can consume each
+            before the next is translated
+
+            All parses are enumerated, checked and ordered by cost when the
+            VakyaGraph is built, before the first is generated. Only their
+            translation into Parses is lazy '''
         self.vgraph = VakyaGraph(self.split,
                                  fast_merge=self.parser.fast_merge,
                                  max_parse_dc=self.parser.split_above)
         parses = self.vgraph.parses[:limit]
         costs = self.vgraph.parse_costs[:limit]
         min_cost = min(costs) if len(costs) else 0
-        if min_cost_only:
-            parses = [x for x, cost in zip(parses, costs) if cost == min_cost]
-        return [Parse(self, parse, cost) for parse, cost in zip(parses, costs)]
+        for parse, cost in zip(parses, costs):
+            if min_cost_only and cost != min_cost:
+                continue
+            with metrics.timed("serialization"):
+                p = Parse(self, parse, cost)
+            yield p
 
     def write_dot(self, basepath):
         self.vgraph.write_dot(basepath)
 
     def to_dot(self):
-        from io import StringIO
-        import networkx as nx
-        s = StringIO()
-        nx.drawing.nx_pydot.write_dot(self.vgraph.G, s)
-        return s.getvalue()
+        return dot.to_dot(self.vgraph.G)
 
     def serializable(self):
         strict_io = self.parser.strict_io
@@ -269,7 +284,7 @@ class Parse(Serializable):
                 pred_node = ParseNode(pred, strict_io, encoding)
                 edge = ParseEdge(pred_node,
                                  node,
-                                 SanskritString(lbl, encoding=sanscript.SLP1).transcoded(encoding, strict_io)
+                                 transcode(lbl, encoding, strict_io)
                                  )
                 graph.append(edge)
             else:
@@ -298,11 +313,7 @@ class Parse(Serializable):
         return r
 
     def to_dot(self):
-        from io import StringIO
-        import networkx as nx
-        s = StringIO()
-        nx.drawing.nx_pydot.write_dot(self.parse_graph, s)
-        return s.getvalue()
+        return dot.to_dot(self.parse_graph)
 
     def serializable(self):
         return {'graph': [x.serializable() for x in self.graph]}
@@ -46,12 +46,27 @@ import re
 import six
 
 
+# Long and pluta vowels to the short ones, for savarna checks
+# १ . १ . ६९ अणुदित् सवर्णस्य चाप्रत्ययः
+_hrasva = str.maketrans('AIUFX', 'aiufx', '3')
+# udits, and the varga each stands for
+_udits = {'k': 'kKgGN', 'c': 'cCjJY', 'w': 'wWqQR', 't': 'tTdDn', 'p': 'pPbBm'}
+
+
+def _slp1(s):
+    ''' SLP1 string for a SanskritImmutableString or SLP1 str '''
+    return s if isinstance(s, str) else s.canonical()
+
+
 class MaheshvaraSutras(object):
     """
     Singleton MaheshvaraSutras class
     Attributes:
     MS(SanskritImmutableString) : Internal representation of mAheshvara sutras
     MSS(str)           : Canonical (SLP1) representation
+
+    Every pratyahara is computed once, at construction, so the checks
+    below are lookups. They take SanskritImmutableStrings or SLP1 strs.
     """
 
     def __init__(self):
@@ -65,32 +80,38 @@ class MaheshvaraSutras(object):
             sanscript.DEVANAGARI)
         # SLP1 version for internal operations
         self.MSS = self.MS.canonical()
+        # (pratyahara, longp) -> varnas, with intermediate as
+        self._pratyaharas = {}
+        # (pratyahara, longp, remove_a) -> (varnas, frozenset of varnas)
+        self._members = {}
+        its = set(self.MSS[i - 1] for i, c in enumerate(self.MSS) if c == ' ')
+        varnas = set(self.MSS) - its - set(' ')
+        for v in varnas:
+            for it in its:
+                for ps in (v + it, v + 'a' + it):
+                    for longp in (True, False):
+                        ts = self._varnas(ps, longp)
+                        if ts is None:
+                            continue
+                        self._pratyaharas[(ps, longp)] = ts
+                        for remove_a in (True, False):
+                            rs = self._remove_a(ts) if remove_a else ts
+                            self._members[(ps, longp, remove_a)] = (rs, frozenset(rs))
 
     def __str__(self):
         # Use SLP1 for default string output
         return self.MSS
 
-    def getPratyahara(self, p, longp=True, remove_a=False, dirghas=False):
-        """
-        Return list of varnas covered by a pratyahara
-
-        Args:
-              p(:class:SanskritImmutableString): Pratyahara
-              longp(boolean :optional:): When True (default), uses long pratyaharas
-              remove_a(boolean :optional:): When True, removes intermediate 'a'.This is better for computational use
-              dirghas(boolean :optional:) When True (default=False) adds dirgha vowels to the returned varnas
-        Returns:
-              (SanskritImmutableString): List of varnas to the same encoding as p
-        """
-
-        # SLP1 encoded pratyahara string
-        ps = p.canonical()
+    def _varnas(self, ps, longp):
+        """ Varnas of SLP1 pratyahara ps, with intermediate as, or None if there is no such pratyahara """
         # it - halantyam
         pit = ps[-1]
         # Non it - all except it
         pnit = ps[:-1]
         # Non it position
         pnpos = self.MSS.find(pnit)
+        if pnpos == -1:
+            return None
         # It position - space added to match it marker in internal
         # representation
         if longp:  # Find last occurence of it
@@ -98,14 +119,39 @@ class MaheshvaraSutras(object):
         else:  # Find first occurence of it
             pitpos = self.MSS.find(pit + ' ', pnpos)
         if pitpos == -1:
-            raise ValueError(f'pratyaahaara {ps} not found in "{self.MSS}". Please recheck input')
+            return None
         # Substring. This includes intermediate its and spaces
         ts = self.MSS[pnpos:pitpos]
         # Replace its and spaces
-        ts = re.sub('. ', '', ts)
+        return re.sub('. ', '', ts)
+
+    @staticmethod
+    def _remove_a(ts):
         # Remove अकारः मुखसुखार्थः
+        return ts[0] + ts[1:].replace('a', '')
+
+    def getPratyahara(self, p, longp=True, remove_a=False, dirghas=False):
+        """
+        Return list of varnas covered by a pratyahara
+
+        Args:
+              p(:class:SanskritImmutableString): Pratyahara
+              longp(boolean :optional:): When True (default), uses long pratyaharas
+              remove_a(boolean :optional:): When True, removes intermediate 'a'.This is better for computational use
+              dirghas(boolean :optional:) When True (default=False) adds dirgha vowels to the returned varnas
+        Returns:
+              (SanskritImmutableString): List of varnas to the same encoding as p
+        """
+
+        # SLP1 encoded pratyahara string
+        ps = _slp1(p)
+        ts = self._pratyaharas.get((ps, longp))
+        if ts is None:
+            ts = self._varnas(ps, longp)
+        if ts is None:
+            raise ValueError(f'pratyaahaara {ps} not found in "{self.MSS}". Please recheck input')
         if remove_a:
-            ts = ts[0] + ts[1:].replace('a', '')
+            ts = self._remove_a(ts)
         # Add dIrgha vowels if requested
         if dirghas:
             ts = ts.replace('a', 'aA').replace('i', 'iI').replace('u', 'uU').replace('f', 'fF').replace('x', 'xX')
@@ -123,21 +169,21 @@ class MaheshvaraSutras(object):
              boolean: Is v in p?
         """
 
-        vs = v.canonical()
         # १ . १ . ६९ अणुदित् सवर्णस्य चाप्रत्ययः
         # So, we change long and pluta vowels to short ones in the input string
-        # Replace long vowels with short ones (note SLP1 encoding)
-        vs = re.sub('[AIUFX]+', lambda m: m.group(0).lower(), vs)
-        # Remove pluta
-        vs = vs.replace('3', '')
+        vs = _slp1(v).translate(_hrasva)
 
-        # Convert Pratyahara into String
         # the 'a' varna needs special treatment - we remove the
         # अकारः मुखसुखार्थः before searching!
-        pos = self.getPratyahara(p, longp, remove_a=vs[0] == 'a').canonical()
-
+        remove_a = vs[0] == 'a'
+        m = self._members.get((_slp1(p), longp, remove_a))
+        if m is None:
+            ts = self.getPratyahara(p, longp, remove_a).canonical()
+            m = (ts, frozenset(ts))
+        if len(vs) == 1:
+            return vs in m[1]
         # Check if varna String is in Pratyahara String
-        return (pos.find(vs) != -1)
+        return vs in m[0]
 
     def isSavarna(self, v, a):
         """
@@ -155,38 +201,21 @@ class MaheshvaraSutras(object):
         Returns
              boolean: Is v savarna to p?
         """
-        ac = a.canonical()
-        vc = v.canonical()
+        ac = _slp1(a)
+        vc = _slp1(v)
 
         # Single
         if len(vc) == 1:
             # १ . १ . ६९ अणुदित् सवर्णस्य चाप्रत्ययः
-            # So, we change long and pluta vowels to short ones in the input string
-            # Replace long vowels with short ones (note SLP1 encoding)
-            ac = re.sub('[AIUFX]+', lambda m: m.group(0).lower(), ac)
-            # Remove pluta
-            ac = ac.replace('3', '')
-            vc = re.sub('[AIUFX]+', lambda m: m.group(0).lower(), vc)
-            # Remove pluta
-            vc = vc.replace('3', '')
-            return ac == vc
+            # So, we change long and pluta vowels to short ones
+            return ac.translate(_hrasva) == vc.translate(_hrasva)
         elif vc[-1] == "t":
             # taparastatkAlasya
             return ac == vc[:-1]
             # FIXME implment tkArsya para interpretation
         elif vc[-1] == "u":
             # १ . १ . ६९ अणुदित् सवर्णस्य चाप्रत्ययः
-            if vc[0] == "k":
-                vc = "kKgGN"
-            elif vc[0] == "c":
-                vc = "cCjJY"
-            elif vc[0] == "w":
-                vc = "wWqQR"
-            elif vc[0] == "t":
-                vc = "tTdDn"
-            elif vc[0] == "p":
-                vc = "pPbBm"
-            return ac in vc
+            return ac in _udits.get(vc[0], vc)
         else:
             return ac in vc
 
@@ -3,46 +3,101 @@ from __future__ import print_function
 from indic_transliteration import sanscript
 from indic_transliteration import detect
 from sanskrit_parser.util import normalization
+from sanskrit_parser.util import metrics
 
 from contextlib import contextmanager
+from functools import lru_cache
 import logging
+import sys
 import six
 
 logger = logging.getLogger(__name__)
 denormalize = False
 
+# Size of the memo of transcodings shared by all strings
+TRANSCODE_CACHE_SIZE = 65536
+# (SLP1 string, encoding, strict_io) -> transcoding, for the fixed
+# vocabulary of tags and labels. Never evicted.
+_vocabulary = {}
+
+
+@lru_cache(maxsize=TRANSCODE_CACHE_SIZE)
+def _transcode(s, encoding, strict_io):
+    if not strict_io:
+        s = normalization.denormalize(s)
+    if encoding != sanscript.SLP1:
+        s = sanscript.transliterate(s, sanscript.SLP1, encoding)
+    return s
+
+
+def transcode(s, encoding, strict_io=True):
+    """ Transcode an SLP1 string
+
+        The same tags and words are output over and over, so results are
+        memoized across strings.
+
+        Args:
+          s(str): SLP1 string
+          encoding(SanskritObject.Scheme): Output encoding
+          strict_io(bool): If False, denormalize s first
+        Returns:
+          str: transcoded version
+    """
+    if strict_io and encoding == sanscript.SLP1:
+        return s
+    r = _vocabulary.get((s, encoding, strict_io))
+    if r is None:
+        r = _transcode(s, encoding, strict_io)
+    return r
+
+
+def register_vocabulary(words, encodings=(sanscript.DEVANAGARI,)):
+    """ Precompute transcodings of a fixed vocabulary (eg: tag names)
+
+        Args:
+          words(iterable): SLP1 strings
+          encodings(iterable): Output encodings to precompute
+    """
+    for w in words:
+        for e in encodings:
+            for strict_io in (True, False):
+                _vocabulary[(w, e, strict_io)] = _transcode.__wrapped__(w, e, strict_io)
+
 
 class SanskritString(object):
     """ Sanskrit String Class: Base of the class hierarchy
 
         Attributes:
-           thing(str)   : thing to be represented
+           thing(str)   : thing to be represented, in SLP1
            encoding(str): SanskritBase encoding of thing as passed (eg: sanscript.HK, sanscript.DEVANAGARI)
         Args:
            thing(str):    As above
            encoding(str): As above
 
+        Transcodings are computed on first use (see transcode), and SLP1
+        input is neither detected nor transliterated.
     """
+    __slots__ = ('thing', 'encoding')
 
     def __init__(self, thing, encoding=None, unicode_encoding='utf-8'):
         assert isinstance(thing, six.string_types)
         # Encode early, unicode everywhere, decode late is the philosophy
         # However, we need to accept both unicode and non unicode strings
         # We are udAramatiH
-        if isinstance(thing, six.text_type):
-            self.thing = thing
-        else:
-            self.thing = six.text_type(thing, unicode_encoding)
+        if not isinstance(thing, six.text_type):
+            thing = six.text_type(thing, unicode_encoding)
         if encoding is None:
             # Autodetect Encoding
-            encoding = detect.detect(self.thing)
+            encoding = detect.detect(thing)
         if encoding != sanscript.SLP1:
             # Convert to SLP1
-            self.thing = sanscript.transliterate(self.thing, encoding, sanscript.SLP1)
+            thing = sanscript.transliterate(thing, encoding, sanscript.SLP1)
             # At this point, we are guaranteed that internal
             # representation is in SLP1
-        self._canonical = None
-        
+        # Interned, as the same words recur across splits and graphs
+        self.thing = sys.intern(thing)
+        self.encoding = encoding
+
     def transcoded(self, encoding=None, strict_io=True):
         """ Return a transcoded version of self
 
@@ -51,18 +106,13 @@ class SanskritString(object):
             Returns:
               str: transcoded version
         """
-        s = self.thing
-        if not strict_io:
-            s = normalization.denormalize(s)
-        return sanscript.transliterate(s, sanscript.SLP1, encoding)
+        return transcode(self.thing, encoding, strict_io)
 
     def canonical(self, strict_io=True):
         """ Return canonical transcoding (SLP1) of self
         """
-        if self._canonical is None:
-            self._canonical = self.transcoded(sanscript.SLP1, strict_io)
-        return self._canonical
-    
+        return self.transcoded(sanscript.SLP1, strict_io)
+
     def devanagari(self, strict_io=True):
         """ Return devanagari transcoding of self
         """
@@ -71,70 +121,60 @@ class SanskritString(object):
     # Updates internal string, leaves everything else alone
     # Not to be used in all cases, as this is very limited
     def update(self, s, encoding=None):
-        self.thing = s
+        self.thing = sys.intern(s)
         if encoding is not None:
             self.encoding = encoding
-        self._canonical = None
-        
+
     def __str__(self):
-        if self._canonical is not None:
-            return self._canonical
-        else:
-            global denormalize
-            s = self.transcoded(sanscript.SLP1)
-            if denormalize:
-                s = normalization.denormalize(s)
-            self._canonical = s
-            return s
+        return self.transcoded(sanscript.SLP1, not denormalize)
 
     def __repr__(self):
         return str(self)
 
     def __getitem__(self, i):
-        return self.canonical()[i]
+        return self.thing[i]
 
     def __len__(self):
-        return len(self.canonical())
+        return len(self.thing)
 
 
 class SanskritImmutableString(SanskritString):
     """ Immutable version of SanskritString
     """
+    __slots__ = ()
+
     def __init__(self, thing=None, encoding=None, unicode_encoding='utf-8'):
         super().__init__(thing, encoding, unicode_encoding)
 
     def __hash__(self):
-        return hash(str(self))
+        return hash(self.thing)
 
     def __eq__(self, other):
+        if isinstance(other, SanskritString):
+            return self.thing == other.thing
         return str(self) == str(other)
 
     def __ne__(self, other):
-        return str(self) != str(other)
+        return not self == other
 
 
 class SanskritNormalizedString(SanskritString):
     """ SanskritString plus Normalization of input
     """
+    __slots__ = ()
+
     def __init__(self, thing=None, encoding=None, unicode_encoding='utf-8',
                  strict_io=True, replace_ending_visarga='s'):
         super().__init__(thing, encoding, unicode_encoding)
         if not strict_io:
-            # Normalize
-            logger.debug("Before normalization: %s", self.thing)
-            tmp = normalization.normalize(self.thing)
-            if replace_ending_visarga == 's':
-                self.thing = normalization.replace_ending_visarga_s(tmp)
-            elif replace_ending_visarga == 'r':
-                self.thing = normalization.replace_ending_visarga_r(tmp)
-            else:
-                self.thing = tmp
-            # Lazy Anusvaras (see issue #103)
-            try:
-                self.thing = sanscript.SCHEMES[sanscript.SLP1].fix_lazy_anusvaara(self.thing)
-            except (NameError, AttributeError):
-                print("Not fixing lazy anusvaras, you probably have an older version of indic_transliteration")
-            logger.debug("After normalization: %s", self.thing)
+            with metrics.timed("normalization"):
+                self._normalize(replace_ending_visarga)
+
+    def _normalize(self, replace_ending_visarga):
+        logger.debug("Before normalization: %s", self.thing)
+        self.thing = normalization.normalize_input(self.thing, replace_ending_visarga)
+        self.thing = sys.intern(self.thing)
+        logger.debug("After normalization: %s", self.thing)
 
 
 class SanskritObject(SanskritNormalizedString):
@@ -143,6 +183,8 @@ class SanskritObject(SanskritNormalizedString):
         Attributes:
 
     """
+    __slots__ = ('tags',)
+
     def __init__(self, thing=None, encoding=None, unicode_encoding='utf-8',
                  strict_io=True, replace_ending_visarga='s'):
         super().__init__(thing, encoding, unicode_encoding, strict_io, replace_ending_visarga)
@@ -6,11 +6,9 @@
 from os.path import dirname, basename, splitext, join
 from argparse import ArgumentParser
 import logging
-from sanskrit_parser import Parser
 from indic_transliteration import sanscript
 from sanskrit_parser.base.sanskrit_base import SanskritNormalizedString
 from sanskrit_parser.base.sanskrit_base import outputctx
-from sanskrit_parser.parser.sandhi_analyzer import LexicalSandhiAnalyzer
 from sanskrit_parser import enable_file_logger, enable_console_logger
 import csv
 
@@ -49,6 +47,7 @@ def getVakyaArgs(argv=None):
 
 
 def vakya(argv=None):
+    from sanskrit_parser import Parser
     args = getVakyaArgs(argv)
     if args.strict_io:
         print("Interpreting input strictly")
@@ -137,6 +136,7 @@ def getSandhiArgs(argv=None):
 
 
 def sandhi(argv=None):
+    from sanskrit_parser import Parser
     args = getSandhiArgs(argv)
     if args.strict_io:
         print("Interpreting input strictly")
@@ -187,6 +187,8 @@ def getTagsArgs(argv=None):
 
 
 def tags(argv=None):
+    # Imported here, so that looking up tags does not load the parser
+    from sanskrit_parser.parser.sandhi_analyzer import LexicalSandhiAnalyzer
     args = getTagsArgs(argv)
     if args.strict_io:
         print("Interpreting input strictly")
@@ -231,15 +233,46 @@ def tags(argv=None):
             print(s.hasTag(i, b, g))
 
 
+def getGeneratorArgs(argv=None):
+    """
+      Argparse routine.
+      Returns args variable
+    """
+    # Parser Setup
+    parser = ArgumentParser(description='Generate a lexicon of the sup forms of pratipadikas')
+    parser.add_argument('pratipadikas', type=str,
+                        help="File listing pratipadikas, one per line: stem linga [tags...]")
+    parser.add_argument('--output', type=str, default="generated_forms.tsv.gz",
+                        help="Generated forms table to write")
+    parser.add_argument('--input-encoding', type=str, default=sanscript.SLP1)
+    parser.add_argument('--processes', type=int, default=None,
+                        help="Worker processes (default: one per cpu)")
+    parser.add_argument('--chunksize', type=int, default=1,
+                        help="Pratipadikas sent to a worker at a time")
+    return parser.parse_args(argv)
+
+
+def generator(argv=None):
+    # Imported here, so that other commands do not load the generator
+    from sanskrit_parser.generator.lexicon import read_pratipadikas, write_lexicon
+    args = getGeneratorArgs(argv)
+    with open(args.pratipadikas, encoding="utf-8") as f:
+        ps = list(read_pratipadikas(f, args.input_encoding))
+    logger.info(f"Generating forms of {len(ps)} pratipadikas")
+    n = write_lexicon(ps, args.output, args.processes, args.chunksize)
+    logger.info(f"Wrote {n} forms to {args.output}")
+
+
 def cmd_line():
     """ Command Line Wrapper Function
     """
     parser = ArgumentParser(description='Sanskrit Parser',
-                            usage='%(prog)s [sandhi|vakya|tag]  [options] \n\n Use %(prog)s [sandhi|vakya|tag] --help for further options',
+                            usage='%(prog)s [sandhi|vakya|tags|generator]  [options] \n\n'
+                                  ' Use %(prog)s [sandhi|vakya|tags|generator] --help for further options',
                             add_help=False)
 
     parser.add_argument('command', help='Subcommand to run',
-                        choices=["sandhi", "vakya", "tags"])
+                        choices=["sandhi", "vakya", "tags", "generator"])
     parser.add_argument('--debug', action='store_true')
 
     # parse_args defaults to [1:] for args, but you need to
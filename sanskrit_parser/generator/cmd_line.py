@@ -22,7 +22,8 @@ from sanskrit_parser.generator.prakriya import Prakriya, PrakriyaVakya
 from sanskrit_parser.generator.pratyaya import *  # noqa: F403
 from sanskrit_parser.generator.dhatu import *  # noqa: F403
 from sanskrit_parser.generator.pratipadika import *  # noqa: F403
-from sanskrit_parser.generator.sutras_yaml import sutra_list
+from sanskrit_parser.generator import sutras_yaml
+from sanskrit_parser.generator.paradigm import vibhakti_tasks
 from sanskrit_parser import enable_file_logger, enable_console_logger
 
 logger = logging.getLogger(__name__)
@@ -40,7 +41,7 @@ def run_pp(s, verbose=False):
             return lelem
         lelem = _gen_obj(s, i)
         pl.append(lelem)
-    p = Prakriya(sutra_list, PrakriyaVakya(pl))
+    p = Prakriya(sutras_yaml.sutra_list, PrakriyaVakya(pl))
     p.execute()
     if verbose:
         p.describe()
@@ -52,29 +53,22 @@ def run_pp(s, verbose=False):
 # Return results with avasAnas stripped as 8x3 list of lists
 def generate_vibhakti(pratipadika, verbose=False):
     r = []
-    for ix, s in enumerate(sups):  # noqa: F405
+    for ix, jx, t in vibhakti_tasks(pratipadika):
+        if ix == len(r):
+            if verbose:
+                logger.info(f"Vibhakti {ix+1} {sups[ix]}")  # noqa: F405
+            else:
+                logger.debug(f"Vibhakti {ix+1} {sups[ix]}")  # noqa: F405
+            r.append([])
+        ss = sups[ix][jx]  # noqa: F405
+        _r = run_pp(t, verbose)
+        r[-1].append(_r)
+        p = [''.join([str(x) for x in y]) for y in _r]
+        pp = ", ".join([x.strip('.') for x in p])
         if verbose:
-            logger.info(f"Vibhakti {ix+1} {s}")
+            logger.info(f"Vacana {jx+1} {ss} {pp}")
         else:
-            logger.debug(f"Vibhakti {ix+1} {s}")
-        r.append([])
-        for jx, ss in enumerate(s):
-            # For nitya eka/dvi/bahuvacana, generate only the appropriate
-            if (((jx == 0) and pratipadika.hasTag("nityEkavacana")) or
-                ((jx == 1) and pratipadika.hasTag("nityadvivacana")) or
-                ((jx == 2) and pratipadika.hasTag("nityabahuvacana")) or
-                (not (pratipadika.hasTag("nityEkavacana") or
-                      pratipadika.hasTag("nityadvivacana") or
-                      pratipadika.hasTag("nityabahuvacana")))):
-                t = [(pratipadika, ss), avasAna]  # noqa: F405
-                _r = run_pp(t, verbose)
-                r[-1].append(_r)
-                p = [''.join([str(x) for x in y]) for y in _r]
-                pp = ", ".join([x.strip('.') for x in p])
-                if verbose:
-                    logger.info(f"Vacana {jx+1} {ss} {pp}")
-                else:
-                    logger.debug(f"Vacana {jx+1} {ss} {pp}")
+            logger.debug(f"Vacana {jx+1} {ss} {pp}")
     return r
 
 
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""
+Reverse lexicon of generated forms
+
+Generates the sup forms of a list of pratipadikas on a process pool, and
+streams them into a generated forms table (form -> stem, tags), which
+LexicalLookupFactory loads as the "generated" lookup (see
+sanskrit_parser.util.generated_forms).
+
+Pratipadika lists have one pratipadika per line, with its linga and any
+other tags (eg: anta tags), as for Pratipadika::
+
+    # stem linga tags...
+    rAma pum
+    saKi pum saKi
+    ramA strI Ap
+
+Command line usage
+==================
+
+::
+
+    $ sanskrit_parser generator stems.txt --output generated_forms.tsv.gz --processes 8
+
+"""
+import logging
+
+from indic_transliteration import sanscript
+from sanskrit_parser.generator.pratipadika import Pratipadika
+from sanskrit_parser.generator.paradigm import iter_vibhaktis
+from sanskrit_parser.util.generated_forms import write_forms
+
+logger = logging.getLogger(__name__)
+
+# Tags of the forms of sups[vibhakti][vacana], and of lingas, in the
+# vocabulary of the other lexical lookups
+VIBHAKTI_TAGS = ['प्रथमाविभक्तिः', 'द्वितीयाविभक्तिः', 'तृतीयाविभक्तिः',
+                 'चतुर्थीविभक्तिः', 'पञ्चमीविभक्तिः', 'षष्ठीविभक्तिः',
+                 'सप्तमीविभक्तिः', 'संबोधनविभक्तिः']
+VACANA_TAGS = ['एकवचनम्', 'द्विवचनम्', 'बहुवचनम्']
+LINGA_TAGS = {"pum": 'पुंल्लिङ्गम्', "strI": 'स्त्रीलिङ्गम्', "napum": 'नपुंसकलिङ्गम्'}
+# Progress is logged every so many pratipadikas
+LOG_EVERY = 1000
+
+
+def read_pratipadikas(lines, encoding=sanscript.SLP1):
+    '''
+    Pratipadikas listed in lines, skipping blank lines and # comments
+
+    Inputs:
+      lines: iterable of "stem linga tags..." lines
+      encoding: Encoding of the stems
+    Raises
+      ValueError on a line without a known linga
+    '''
+    for n, line in enumerate(lines, 1):
+        f = line.split()
+        if (not f) or f[0].startswith("#"):
+            continue
+        if (len(f) < 2) or (f[1] not in LINGA_TAGS):
+            raise ValueError(f"Line {n}: expected stem, linga ({', '.join(LINGA_TAGS)}) and tags, got {line.strip()}")
+        yield Pratipadika(f[0], f[1], other_tags=f[2:], encoding=encoding)
+
+
+def form(output):
+    ''' Lexicon form of a prakriya output: SLP1, without avasAna, final visarga as s '''
+    f = "".join(x.canonical() for x in output if not x.hasTag("avasAna"))
+    if f.endswith("H"):
+        f = f[:-1] + "s"
+    return f
+
+
+def lexicon_rows(pratipadikas, processes=None, chunksize=1):
+    '''
+    Generated forms table rows for the sup forms of pratipadikas
+
+    Inputs:
+      pratipadikas: list of Pratipadika
+      processes, chunksize: As for paradigm.iter_vibhaktis
+    Outputs
+      (form, stem, tags) for each form, as it is generated
+    '''
+    forms = iter_vibhaktis(pratipadikas, processes, chunksize)
+    for n, (p, pforms) in enumerate(zip(pratipadikas, forms), 1):
+        stem = p.canonical()
+        linga = LINGA_TAGS[p.linga]
+        for ix, jx, outputs in pforms:
+            tags = (VIBHAKTI_TAGS[ix], VACANA_TAGS[jx], linga)
+            # Distinct forms, in order
+            for f in dict.fromkeys(form(o) for o in outputs):
+                yield f, stem, tags
+        if n % LOG_EVERY == 0:
+            logger.info(f"Generated forms of {n} pratipadikas")
+
+
+def write_lexicon(pratipadikas, path, processes=None, chunksize=1):
+    '''
+    Write the generated forms table for pratipadikas to path
+
+    Outputs
+      Number of forms written
+    '''
+    return write_forms(path, lexicon_rows(list(pratipadikas), processes, chunksize))
@@ -1,6 +1,4 @@
-from indic_transliteration import sanscript
 from sanskrit_parser.base.maheshvara_sutra import MaheshvaraSutras
-from sanskrit_parser.base.sanskrit_base import SanskritImmutableString
 
 ms = MaheshvaraSutras()
 
@@ -10,10 +8,6 @@ ms = MaheshvaraSutras()
 def isInPratyahara(p, s):
     if s == "":
         return False
-    if isinstance(p, str):
-        p = SanskritImmutableString(p, sanscript.SLP1)
-    if isinstance(s, str):
-        s = SanskritImmutableString(s, sanscript.SLP1)
     return ms.isInPratyahara(p, s)
 
 
@@ -24,10 +18,6 @@ def isSavarna(p, s):
     elif ((s == "") and (p == "")):
         return True
     else:
-        if isinstance(p, str):
-            p = SanskritImmutableString(p, sanscript.SLP1)
-        if isinstance(s, str):
-            s = SanskritImmutableString(s, sanscript.SLP1)
         return ms.isSavarna(p, s)
 
 
@@ -26,6 +26,29 @@ class PaninianObject(SanskritObject):
         self.disabled_sutras = []
         # Prakriya Related Tags are ephemeral
 
+    def copy(self):
+        """ Copy of self, for prakriya state
+
+            Tags, its and disabled sutras are copied, everything else
+            is immutable and shared. Same as, but cheaper than, deepcopy
+        """
+        c = object.__new__(type(self))
+        c.thing = self.thing
+        c.encoding = self.encoding
+        c.tags = list(self.tags)
+        c.__dict__.update((k, list(v) if isinstance(v, list) else v)
+                          for k, v in self.__dict__.items())
+        return c
+
+    def state(self):
+        """ Hashable prakriya state of self
+
+            Objects with equal states are treated alike by all sutras
+        """
+        return (type(self), self.thing, self.encoding, tuple(self.tags),
+                tuple((k, tuple(v) if isinstance(v, list) else v)
+                      for k, v in self.__dict__.items()))
+
     def hasTag(self, t):
         return t in self.tags
 
@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+"""
+Paradigm generation
+
+A paradigm (eg: the sup table of a pratipadika) is a table of forms, each
+of which is derived by its own prakriya. Paradigms of many stems are
+generated by fanning their prakriyas out to a process pool, and collecting
+the outputs back in table order. Each process memoizes prakriya steps
+(see prakriya.DerivationMemo), so prakriyas that reach a state already
+derived in that process share the rest of the derivation.
+
+Usage
+=====
+
+.. code:: python
+
+    >>> from sanskrit_parser.generator.pratipadika import rAma, hari
+    >>> from sanskrit_parser.generator.paradigm import generate_vibhaktis
+    >>> tables = generate_vibhaktis([rAma, hari], processes=4)
+    >>> tables[0][0][0]  # rAma, praTamA ekavacana
+    [['rAmaH', '.']]
+
+Other paradigms (eg: tiN tables) are lists of prakriya inputs passed to
+``run_tasks``.
+"""
+import logging
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from sanskrit_parser.generator.prakriya import Prakriya, PrakriyaVakya, DerivationMemo
+from sanskrit_parser.generator.pratyaya import sups, avasAna
+from sanskrit_parser.generator import sutras_yaml
+
+logger = logging.getLogger(__name__)
+
+# Prakriyas sent to a worker at a time
+CHUNKSIZE = 8
+# Steps memoized by prakriyas in this process
+_memo = DerivationMemo()
+
+
+def vibhakti_tasks(pratipadika):
+    '''
+    Sup forms of pratipadika
+
+    For nitya eka/dvi/bahuvacana pratipadikas, only the appropriate
+    vacana is generated
+    Outputs
+      (vibhakti index, vacana index, prakriya inputs) for each form
+    '''
+    nitya = [pratipadika.hasTag(t) for t in ("nityEkavacana", "nityadvivacana", "nityabahuvacana")]
+    for ix, s in enumerate(sups):
+        for jx, ss in enumerate(s):
+            if nitya[jx] or not any(nitya):
+                yield ix, jx, [(pratipadika, ss), avasAna]
+
+
+def derive(inputs):
+    ''' Outputs of the prakriya for inputs, as from Prakriya.output '''
+    p = Prakriya(sutras_yaml.sutra_list, PrakriyaVakya(inputs), _memo)
+    p.execute()
+    return p.output()
+
+
+def run_tasks(tasks, processes=None, chunksize=CHUNKSIZE):
+    '''
+    Run a prakriya for each of tasks
+
+    Inputs:
+      tasks: list of prakriya inputs
+      processes: Number of worker processes (def=os.cpu_count()).
+                 1 runs the prakriyas in this process
+      chunksize: Number of tasks sent to a worker at a time
+    Outputs
+      list of outputs of derive, in the order of tasks
+    '''
+    if processes == 1:
+        return [derive(t) for t in tasks]
+    # Loaded here, so that forked workers inherit the sutras
+    sutras_yaml.load()
+    logger.debug(f"Running {len(tasks)} prakriyas on {processes} processes")
+    with ProcessPoolExecutor(max_workers=processes, initializer=sutras_yaml.load) as pool:
+        return list(pool.map(derive, tasks, chunksize=chunksize))
+
+
+def vibhakti_forms(pratipadika):
+    ''' (vibhakti index, vacana index, outputs) for each sup form of pratipadika '''
+    return [(ix, jx, derive(t)) for ix, jx, t in vibhakti_tasks(pratipadika)]
+
+
+def _vibhakti_chunk(pratipadikas):
+    return [vibhakti_forms(p) for p in pratipadikas]
+
+
+def iter_vibhaktis(pratipadikas, processes=None, chunksize=1):
+    '''
+    vibhakti_forms of each of pratipadikas, in order, as they are generated
+
+    Unlike generate_vibhaktis, all forms of a pratipadika are derived by
+    one worker, and pratipadikas are read only as workers need them (at
+    most two chunks per process are pending), so results can be consumed
+    as they come, for any number of pratipadikas
+    Inputs:
+      pratipadikas: iterable of Pratipadika
+      processes: As for run_tasks
+      chunksize: Number of pratipadikas sent to a worker at a time
+    '''
+    if processes == 1:
+        for p in pratipadikas:
+            yield vibhakti_forms(p)
+        return
+    window = 2 * (processes or os.cpu_count())
+    it = iter(pratipadikas)
+    chunks = iter(lambda: list(islice(it, chunksize)), [])
+    # Loaded here, so that forked workers inherit the sutras
+    sutras_yaml.load()
+    with ProcessPoolExecutor(max_workers=processes, initializer=sutras_yaml.load) as pool:
+        pending = deque()
+        try:
+            for chunk in chunks:
+                pending.append(pool.submit(_vibhakti_chunk, chunk))
+                if len(pending) >= window:
+                    yield from pending.popleft().result()
+            while pending:
+                yield from pending.popleft().result()
+        finally:
+            # Consumer stopped early
+            for f in pending:
+                f.cancel()
+
+
+def generate_vibhaktis(pratipadikas, processes=None, chunksize=CHUNKSIZE):
+    '''
+    Sup tables of pratipadikas
+
+    Inputs:
+      pratipadikas: list of Pratipadika
+      processes, chunksize: As for run_tasks
+    Outputs
+      list of tables, one per pratipadika. Each table is a list of
+      vibhaktis, each a list of the outputs of its vacanas, as
+      cmd_line.generate_vibhakti returns
+    '''
+    rows = []
+    tasks = []
+    for px, pratipadika in enumerate(pratipadikas):
+        for ix, jx, t in vibhakti_tasks(pratipadika):
+            rows.append((px, ix))
+            tasks.append(t)
+    tables = [[[] for s in sups] for p in pratipadikas]
+    for (px, ix), o in zip(rows, run_tasks(tasks, processes, chunksize)):
+        tables[px][ix].append(o)
+    return tables
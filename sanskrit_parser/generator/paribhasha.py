@@ -300,15 +300,9 @@ def null(s):
 
 # sUtra: adeN guRaH
 def is_guna(s: str):
-    so = SanskritImmutableString(s, encoding=sanscript.SLP1)
-    at = "a"
-    eng = SanskritImmutableString("eN", encoding=sanscript.SLP1)
-    return (s == at) or ms.isInPratyahara(eng, so)
+    return (s == "a") or ms.isInPratyahara("eN", s)
 
 
 # sUtra: vRdDirAdEc
 def is_vriddhi(s: str):
-    so = SanskritImmutableString(s, encoding=sanscript.SLP1)
-    aat = "A"
-    aich = SanskritImmutableString("Ec", encoding=sanscript.SLP1)
-    return (s == aat) or ms.isInPratyahara(aich, so)
+    return (s == "A") or ms.isInPratyahara("Ec", s)
@@ -12,12 +12,58 @@ produce a vakya.
 @author: kmadathil
 """
 
-from sanskrit_parser.generator.sutra import GlobalDomains
+from sanskrit_parser.generator.sutra import GlobalDomains, SutraIndex
 from sanskrit_parser.generator.paninian_object import PaninianObject
+from collections import OrderedDict
 from copy import deepcopy, copy
 import logging
 logger = logging.getLogger(__name__)
 
+# Steps kept by a DerivationMemo
+MEMO_SIZE = 8192
+
+# Sutra -> sutras whose outputs it sees despite asiddhatva
+_siddha_for = {
+    # zqutva is siddha for q lopa
+    83013: (84041,),
+    # q, r lopa siddha for purvadirgha
+    63111: (83013, 83014),
+}
+# Dispatch indexes, by id of the sutra list
+_indexes = {}
+# Sutras with their own views, by id of the in domain sutra tuple
+_own_views = {}
+
+
+def _special_siddha(a1, a2):
+    # Wrapper for special "siddha" situations
+    return a1 in _siddha_for.get(a2, ())
+
+
+def sutra_index(sutra_list):
+    ''' SutraIndex for sutra_list, built on first use '''
+    i = _indexes.get(id(sutra_list))
+    if (i is None) or (i[0] is not sutra_list):
+        i = _indexes[id(sutra_list)] = (sutra_list, SutraIndex(sutra_list))
+    return i[1]
+
+
+def _own_view(s):
+    ''' True if sutra s may not see what sapadasaptapadi sutras see '''
+    return _own_view_num(s._aps_num)
+
+
+def _own_view_num(aps_num):
+    return (aps_num >= 82000) or (aps_num in _siddha_for)
+
+
+def _own_view_sutras(sutras):
+    ''' Sutras in the tuple sutras with their own views '''
+    o = _own_views.get(id(sutras))
+    if (o is None) or (o[0] is not sutras):
+        o = _own_views[id(sutras)] = (sutras, tuple(s for s in sutras if _own_view(s)))
+    return o[1]
+
 
 class PrakriyaVakya(object):
     """
@@ -33,38 +79,56 @@ class PrakriyaVakya(object):
             lists thereof
     Internal storage:
             - List of lists of PaninianObject objects
+
+    Objects are copied on write: they are shared between vakyas, and
+    copied when they are replaced or inserted, or by own_at before they
+    are changed in place.
     """
     def __init__(self, v):
-        # Deepcopy is required because we add tags to objects
+        # Copy is required because we add tags to objects
         # during prakriya, and we do not want predefined objects getting
         # tags.
-        self.v = deepcopy(list(v))
+        self.v = [_copy(x) for x in v]
+
+    @classmethod
+    def _shared(cls, v):
+        # Vakya over list v, without copying its objects
+        vc = cls.__new__(cls)
+        vc.v = v
+        return vc
 
     def need_hierarchy_at(self, ix):
         return not _isScalar(self.v[ix])
 
     def copy_replace_at(self, ix, r):
-        vc = PrakriyaVakya(self.v)
-        # As above, deepcopy to prevent predefined objects getting tags
-        vc.v[ix] = deepcopy(r)
-        return vc
+        v = list(self.v)
+        # As above, copy to prevent predefined objects getting tags
+        v[ix] = _copy(r)
+        return PrakriyaVakya._shared(v)
 
     def copy_insert_at(self, ix, r):
-        vc = PrakriyaVakya(self.v)
-        # As above, deepcopy to prevent predefined objects getting tags
-        vc.v.insert(ix, deepcopy(r))
-        return vc
+        v = list(self.v)
+        # As above, copy to prevent predefined objects getting tags
+        v.insert(ix, _copy(r))
+        return PrakriyaVakya._shared(v)
 
     def replace_at(self, ix, r):
-        # As above, deepcopy to prevent predefined objects getting tags
-        self.v[ix] = deepcopy(r)
+        # As above, copy to prevent predefined objects getting tags
+        self.v[ix] = _copy(r)
         return self
 
     def insert_at(self, ix, r):
-        # As above, deepcopy to prevent predefined objects getting tags
-        self.v.insert(ix, deepcopy(r))
+        # As above, copy to prevent predefined objects getting tags
+        self.v.insert(ix, _copy(r))
         return self
 
+    def own_at(self, ix):
+        """ Object at ix, copied so that it can be changed in place
+            without changing other vakyas that share it
+        """
+        self.v[ix] = self.v[ix].copy()
+        return self.v[ix]
+
     def __getitem__(self, ix):
         return self.v[ix]
 
@@ -85,9 +149,14 @@ class Prakriya(object):
     Inputs:
        sutra_list: list of Sutra objects
        inputs    : PrakriyaVakya object
+       memo      : DerivationMemo shared with other prakriyas (def=None, no memo)
     """
-    def __init__(self, sutra_list, inputs):
+    def __init__(self, sutra_list, inputs, memo=None):
         self.sutra_list = sutra_list
+        self.index = sutra_index(sutra_list)
+        if memo is not None:
+            memo.bind(sutra_list)
+        self.memo = memo
         self.pre_inputs = deepcopy(inputs)
         self.inputs = copy(inputs)
         self.hier_prakriyas = []
@@ -103,7 +172,7 @@ class Prakriya(object):
                 self.need_hier = True
                 # hierarchy needed here
                 hp = Prakriya(sutra_list,
-                              PrakriyaVakya(self.inputs[ix]))
+                              PrakriyaVakya(self.inputs[ix]), memo)
                 self.hier_prakriyas.append(hp)
                 # This will execute hierarchically as needed
                 hp.execute()
@@ -192,59 +261,80 @@ class Prakriya(object):
         Current view as seen by sutra s
 
         """
-        # Wrapper for special "siddha" situations
-        def _special_siddha(a1, a2):
-            # zqutva is siddha for q lopa
-            if (a1 == 84041) and (a2 == 83013):
-                return True
-            # q, r lopa siddha for purvadirgha
-            elif ((a1 == 83013) or (a1 == 83014)) and (a2 == 63111):
-                return True
-            else:
-                return False
+        if node is None:
+            return self.inputs
+        _n, ix = self._view_source(s, node, ix)
+        return _n.outputs[ix:ix+2]
 
+    def _view_source(self, s, node, ix):
+        """ Node in whose outputs sutra s sees window ix of node, and the window's index in them """
         if s is not None:
             aps_num = s._aps_num
         else:
             aps_num = 0
-        # Default view
-        _l = self.inputs
-        if node is None:
-            # logger.debug(f"View {l} {node}")
-            return _l
-        if aps_num < 82000:
-            # FIXME: Only Sapadasaptapadi implemented.
-            # Need to implement asiddhavat, zutvatokorasiddhaH
-            # Can see the entire sapadasaptapadi
-            _n = node
-            while (self.tree.parent[_n] is not None) and \
-                  ((_n.sutra._aps_num > 82000)
-                   and not _special_siddha(_n.sutra._aps_num, aps_num)):
-                _n = self.tree.parent[_n]
-            _l = _n.outputs
-        else:
-            # Asiddha
-            # Can see all outputs of sutras less than oneself
-            _n = node
-            while (self.tree.parent[_n] is not None) and \
-                  ((_n.sutra._aps_num > aps_num)
-                   and not _special_siddha(_n.sutra._aps_num, aps_num)):
-                _n = self.tree.parent[_n]
-            _l = _n.outputs
+        _n = self._visible(node, aps_num)
+        _l = _n.outputs
         if ix > (len(_l)-2):
             # Someone has inserted something this sutra can't see
             logger.debug(f"Unseen insertion? {s} {_l} {ix}")
             ix = len(_l) - 2
-        return _l[ix:ix+2]
+        return _n, ix
+
+    def _visible(self, node, aps_num):
+        """ Nearest node, from node up, whose outputs sutra aps_num can see
+
+            Cached in each node, by visibility class: sapadasaptapadi
+            sutras all see the same, others each have their own view
+        """
+        cls = aps_num if _own_view_num(aps_num) else 0
+        v = node.visible.get(cls)
+        if v is None:
+            # FIXME: Only Sapadasaptapadi implemented.
+            # Need to implement asiddhavat, zutvatokorasiddhaH
+            # Sapadasaptapadi sutras can see the entire sapadasaptapadi
+            # Asiddha: Tripadi sutras can see all outputs of sutras less than oneself
+            p = self.tree.parent(node)
+            n_num = node.sutra._aps_num if p is not None else 0
+            if (p is None) or (n_num <= max(aps_num, 82000)) or _special_siddha(n_num, aps_num):
+                v = node
+            else:
+                v = self._visible(p, aps_num)
+            node.visible[cls] = v
+        return v
+
+    def _triggered(self, node, ix):
+        ''' Sutras triggered at window ix, in sutra list order '''
+        disabled = node.outputs[ix].disabled_sutras
+        # What sapadasaptapadi sutras see
+        v = self.view(None, node, ix)
+        cands = self.index.candidates(self.domains, v[0].canonical(), v[1].canonical())[0]
+        triggered = [s for s in cands if ((not _own_view(s)) and (s.aps not in disabled)
+                                          and s.isTriggered(*v, self.domains))]
+        # Tripadi and special siddha sutras, with their own views
+        # Views and candidates, by the node seen
+        seen = {}
+        own = False
+        for s in _own_view_sutras(self.index.in_domain(self.domains)):
+            if s.aps not in disabled:
+                vn = self._visible(node, s._aps_num)
+                sc = seen.get(vn.tix)
+                if sc is None:
+                    sv = self.view(s, node, ix)
+                    sc = seen[vn.tix] = (sv, self.index.candidates(self.domains, sv[0].canonical(), sv[1].canonical())[1])
+                sv, cand_set = sc
+                if (s in cand_set) and s.isTriggered(*sv, self.domains):
+                    triggered.append(s)
+                    own = True
+        if own:
+            triggered.sort(key=lambda s: self.index.position[s.aps])
+        return triggered
 
     def _exec_single(self, node):
         l = self.sutra_list  # noqa: E741
         # Sliding window, check from left
         for ix in range(len(node.outputs)-1):
             logger.debug(f"Disabled Sutras at window {ix} {[s for s in node.outputs[ix].disabled_sutras]}")
-            triggered = []
-            triggered = [s for s in l if ((s.aps not in node.outputs[ix].disabled_sutras)
-                                          and s.isTriggered(*self.view(s, node, ix), self.domains))]
+            triggered = self._triggered(node, ix)
             # Break at first index from left where trigger occurs
             if triggered:
                 _ix = ix
@@ -256,7 +346,10 @@ class Prakriya(object):
             for t in triggered:
                 logger.debug(t)
             s = self.sutra_priority(triggered)
-            v = self.view(s, node, ix)
+            # The sutra may change its view (update, disabled sutras), so
+            # it is owned by the outputs it is seen in
+            src, vix = self._view_source(s, node, ix)
+            v = [src.outputs.own_at(vix), src.outputs.own_at(vix+1)]
             logger.debug(f"Sutra {s} View {v} Disabled: {[s for s in v[0].disabled_sutras]}")
             assert s.aps not in v[0].disabled_sutras
             # Transformation
@@ -285,64 +378,128 @@ class Prakriya(object):
             # FIXME: disable sutras for AkaqArAdekA saMjYA
 
             logger.debug(f"O: {r} {[_r.tags for _r in r]} Disabled: {[[s for s in _r.disabled_sutras] for _r in r]}")
-            # Update Prakriya Tree
-            # Craft inputs and outputs based on viewed inputs
-            # And generated outputs
-            pnv = node.outputs.copy_replace_at(ix, v[0]).copy_replace_at(ix+1, v[1])
-            pnr = node.outputs.copy_replace_at(ix, r[0]).copy_replace_at(ix+1, r[1])
-            if len(r) > 2:
-                for i in range(len(r)-2):
-                    pnr = pnr.copy_insert_at(ix+i+2, r[i+2])
-            _ps = PrakriyaNode(pnv, pnr, s, ix, [t for t in triggered if t != s])
-            logger.debug(f'O Node: {str(_ps)}')
-            if node is not None:
-                self.tree.add_child(node, _ps, opt=s.optional)
-            else:
-                self.tree.add_node(_ps, root=True)
+            others = [t for t in triggered if t != s]
+            if self.memo is not None:
+                depth = 0
+                _n = node
+                while _n is not src:
+                    _n = self.tree.parent(_n)
+                    depth += 1
+                self._step = (s, ix, others, depth, vix,
+                              [x.copy() for x in v], [x.copy() for x in r])
+            self._add_step(node, s, ix, others, v, r)
             return r
         else:
             logger.debug(f"Domain {self.domains.active_domain()} - Nothing triggered")
             return False
 
+    def _add_step(self, node, s, ix, others, v, r):
+        """ Add the child of node for sutra s at window ix, which changed view v into r """
+        # Update Prakriya Tree
+        # Craft inputs and outputs based on viewed inputs
+        # And generated outputs
+        pnv = node.outputs.copy_replace_at(ix, v[0]).copy_replace_at(ix+1, v[1])
+        pnr = node.outputs.copy_replace_at(ix, r[0]).copy_replace_at(ix+1, r[1])
+        if len(r) > 2:
+            for i in range(len(r)-2):
+                pnr = pnr.copy_insert_at(ix+i+2, r[i+2])
+        _ps = PrakriyaNode(pnv, pnr, s, ix, others)
+        logger.debug(f'O Node: {str(_ps)}')
+        if node is not None:
+            self.tree.add_child(node, _ps, opt=s.optional)
+        else:
+            self.tree.add_node(_ps, root=True)
+
+    def _step_key(self, node):
+        """ Everything the sutras can see from node, for DerivationMemo
+
+            Tripadi sutras can see the outputs of tripadi ancestors, back to the
+            first node of a sapadasaptapadi sutra (see _view_source)
+        """
+        k = []
+        _n = node
+        while True:
+            if self.tree.parent(_n) is None:
+                k.append((None, tuple(o.state() for o in _n.outputs)))
+                return tuple(k)
+            k.append((_n.sutra._aps_num, tuple(o.state() for o in _n.outputs)))
+            if _n.sutra._aps_num < 82000:
+                return tuple(k)
+            _n = self.tree.parent(_n)
+
+    def _replay(self, node, step):
+        """ Repeat on node a step from DerivationMemo """
+        d, step = step
+        self.domains.set_domain(d)
+        if step is None:
+            return False
+        s, ix, others, depth, vix, v, r = step
+        logger.debug(f"Memoized {s} at window {ix}")
+        src = node
+        for i in range(depth):
+            src = self.tree.parent(src)
+        src.outputs.replace_at(vix, v[0]).replace_at(vix+1, v[1])
+        r = [x.copy() for x in r]
+        self._add_step(node, s, ix, others, src.outputs[vix:vix+2], r)
+        return r
+
     def _exec_all_domains(self, node):
+        if self.memo is not None:
+            key = self._step_key(node)
+            step = self.memo.get(key)
+            if step is not None:
+                return self._replay(node, step)
+            self._step = None
         for d in ["saMjYA", "prakfti", "pratyaya", "aNga", "standard", "pada", "saMhitA"]:
             self.domains.set_domain(d)
             r = self._exec_single(node)
             if r:
-                return r
-        # Only if nothing ever triggered
-        return False
+                break
+        if self.memo is not None:
+            self.memo.put(key, (d, self._step))
+        # False only if nothing ever triggered
+        return r
 
     def execute(self):
         if self.need_hier:
             logger.debug(f"Input: {self.hier_inputs}")
         else:
             logger.debug(f"Input: {self.inputs}")
-        done = []
+        done = set()
         act = False
         # Initial run on input
         for r in self.tree.get_root():
-            _act = self._exec_all_domains(r)
-            act = act or _act
-        if (act):
-            # Iterate over leaves if something triggered
-            while (act):
-                act = False
-                for n in self.tree.get_leaves():
-                    if n not in done:
-                        res = self._exec_all_domains(n)
-                        if not res:
-                            done.append(n)
-                        else:
-                            act = True
-            for n in self.tree.get_leaves():
-                assert n in done
-                self.outputs.append(n.outputs)
-        else:
-            # Nothing triggered
+            if self._exec_all_domains(r):
+                act = True
+            else:
+                done.add(r)
+        # Iterate over leaves if something triggered
+        # Each pass runs the leaves in leaf list order, as the list is
+        # updated: children added are run in the same pass. A node that is
+        # no longer a leaf is dropped from the list, which leaves the leaf
+        # after it to the next pass. This order fixes the output order.
+        while act:
+            act = False
+            leaves = self.tree.get_leaves()
+            i = 0
+            while i < len(leaves):
+                n = leaves[i]
+                i += 1
+                if n in done:
+                    continue
+                if self._exec_all_domains(n):
+                    act = True
+                    # The child just added
+                    leaves.append(self.tree.nodes[-1])
+                    if not self.tree.is_leaf(n):
+                        del leaves[i-1]
+                else:
+                    done.add(n)
+        if len(self.tree.nodes) == len(self.tree.roots):
             logger.debug("Nothing Triggered - Passthrough")
-            for n in self.tree.get_root():
-                self.outputs.append(n.outputs)
+        for n in self.tree.get_leaves():
+            assert n in done
+            self.outputs.append(n.outputs)
         r = self.outputs
         logger.debug(f"Final Result: {r}\n")
         return r
@@ -368,6 +525,47 @@ class Prakriya(object):
         return self.tree.dict()
 
 
+class DerivationMemo(object):
+    """
+    Memo of prakriya steps, for sharing derivations between prakriyas
+
+    A step (running all domains on a node) depends only on what the
+    sutras can see from the node. The sutra that fired and the state it
+    produced are memoized on that, and replayed at nodes, of this or other
+    prakriyas, that see the same state.
+
+    Inputs:
+       size: Maximum number of steps memoized (def=MEMO_SIZE)
+    """
+    def __init__(self, size=None):
+        self.size = MEMO_SIZE if size is None else size
+        self.sutra_list = None
+        self.hits = 0
+        self.misses = 0
+        self._steps = OrderedDict()
+
+    def bind(self, sutra_list):
+        """ Memoized steps are only valid for one sutra list """
+        if self.sutra_list is None:
+            self.sutra_list = sutra_list
+        elif self.sutra_list is not sutra_list:
+            raise ValueError("DerivationMemo is already used with another sutra list")
+
+    def get(self, key):
+        step = self._steps.get(key)
+        if step is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self._steps.move_to_end(key)
+        return step
+
+    def put(self, key, step):
+        self._steps[key] = step
+        if len(self._steps) > self.size:
+            self._steps.popitem(last=False)
+
+
 _node_id = 0
 
 
@@ -390,18 +588,20 @@ class PrakriyaNode(object):
         self.sutra = sutra
         self.other_sutras = other_sutras
         self.index = ix
+        # Position in its PrakriyaTree
+        self.tix = None
+        # Visible ancestors, by visibility class (see Prakriya._visible)
+        self.visible = {}
 
     def __str__(self):
         return f"{self.id} {self.sutra} {self.inputs} {self.index}-> {self.outputs}"
 
+    # Node ids are unique
     def __hash__(self):
-        return hash("{self.sutra} {self.inputs} {self.index}-> {self.outputs}")
+        return hash(self.id)
 
     def __eq__(self, other):
-        return str(self) == str(other)
-
-    def __ne__(self, other):
-        return str(self) != str(other)
+        return isinstance(other, PrakriyaNode) and (self.id == other.id)
 
     def describe(self):
         print("Prakriya Node")
@@ -426,43 +626,60 @@ class PrakriyaNode(object):
 class PrakriyaTree(object):
     """
     Prakriya Tree: Tree of PrakriyaNodes
+
+    Nodes are kept in arrays, indexed by their position in the tree
+    (PrakriyaNode.tix). Leaves are kept in the order they were added.
     """
     def __init__(self, node=None):
-        self.children = {}
-        self.parent = {}
-        self.leaves = []
+        self.nodes = []
+        # tix of parent (None for roots), and of children, by tix
+        self._parent = []
+        self._children = []
+        # tix -> None, ie: an ordered set
+        self._leaves = {}
         self.roots = []
         if node is not None:
             self.add_node(node)
 
     def add_node(self, node, root=False):
-        self.children[node] = []
-        self.leaves.append(node)
+        node.tix = len(self.nodes)
+        self.nodes.append(node)
+        self._parent.append(None)
+        self._children.append([])
+        self._leaves[node.tix] = None
         if root:
-            self.parent[node] = None
             self.roots.append(node)
 
+    def parent(self, node):
+        p = self._parent[node.tix]
+        return None if p is None else self.nodes[p]
+
+    def children(self, node):
+        return [self.nodes[c] for c in self._children[node.tix]]
+
+    def is_leaf(self, node):
+        return node.tix in self._leaves
+
     def get_leaves(self):
-        return self.leaves
+        return [self.nodes[t] for t in self._leaves]
 
     def get_root(self):
         return self.roots
 
     def add_child(self, node, c, opt=False):
-        self.children[node].append(c)
-        assert (c not in self.parent), f"Duplicated {c}, hash{c}"
-        self.parent[c] = node
-        if c not in self.children:
-            self.add_node(c)
-        if (not opt) and (node in self.leaves):
-            self.leaves.remove(node)
+        assert (c.tix is None), f"Duplicated {c}"
+        self.add_node(c)
+        self._children[node.tix].append(c.tix)
+        self._parent[c.tix] = node.tix
+        if not opt:
+            self._leaves.pop(node.tix, None)
 
     def describe(self):
         def _desc(n):
             n.describe()
-            if n in self.leaves:
+            if self.is_leaf(n):
                 print("Leaf Node")
-            for c in self.children[n]:
+            for c in self.children(n):
                 print("Child")
                 _desc(c)
         for r in self.roots:
@@ -472,13 +689,20 @@ class PrakriyaTree(object):
     def dict(self):
         def _dict(n):
             d = n.dict()
-            d['children'] = [_dict(c) for c in self.children[n]]
+            d['children'] = [_dict(c) for c in self.children(n)]
             return d
         return {
             'root': _dict(self.roots[0])
             }
 
 
+def _copy(x):
+    # Copy of a vakya element, which may be a hierarchy of objects
+    if isinstance(x, (list, tuple)):
+        return type(x)(_copy(y) for y in x)
+    return x.copy()
+
+
 def _isScalar(x):
     # We do not expect np arrays or other funky nonscalars here
     return not (isinstance(x, list) or isinstance(x, tuple))
@@ -13,20 +13,291 @@ from sanskrit_parser.generator.pratipadika import *  # noqa: F403
 import logging
 logger = logging.getLogger(__name__)
 
+# Condition variables that are substrings of the left and right inputs
+_substrings = {
+    "l": lambda lp, rp: lp[-1:],
+    "r": lambda lp, rp: rp[:1],
+    "ll": lambda lp, rp: lp[-2:-1],
+    "rr": lambda lp, rp: rp[1:2],
+    "lc": lambda lp, rp: lp[:-1],
+    "rc": lambda lp, rp: rp[1:],
+}
+
+
+def _precondition(cond):
+    '''
+    Precondition of a sutra condition, on the strings of its inputs
+
+    Checks that only need the strings (pratyahara, savarna, raw
+    (in)equality) are kept, and the rest (tags, its, functions) are
+    assumed to hold. So the precondition holds whenever the condition does.
+
+    Inputs:
+      cond: Sutra condition, as in the yaml
+    Outputs
+      function(lp, rp) of SLP1 strings, or None if nothing can be checked
+    '''
+    def _single(sk, k):
+        # Returns a check on the dict of strings, or None
+        if k in ["lp", "rp"]:
+            # Padas are PaninianObjects, only raw checks are on strings
+            if (sk[0] == "="):
+                return lambda v: v[k] == sk[1:]
+            elif (sk[0:2] == "!="):
+                return lambda v: v[k] != sk[2:]
+            return None
+        if k not in _substrings:
+            return None
+        if (sk[0] == "_"):
+            return lambda v: isInPratyahara(sk[1:], v[k])  # noqa: F405
+        elif (sk[0:2] == "$$"):
+            return None
+        elif (sk[0] == "$"):
+            if sk[1:] not in _substrings:
+                return None
+            return lambda v: isSavarna(v[sk[1:]], v[k])  # noqa: F405
+        elif (sk[0] == "="):
+            return lambda v: sk[1:] == v[k]
+        elif (sk[0:2] == "!="):
+            return lambda v: sk[2:] != v[k]
+        elif (sk[0] in ["?", "+"]):
+            return None
+        else:
+            return lambda v: isSavarna(sk, v[k])  # noqa: F405
+
+    def _all(checks):
+        checks = [c for c in checks if c is not None]
+        if not checks:
+            return None
+        return lambda v: all(c(v) for c in checks)
+
+    def _any(checks):
+        if (not checks) or (None in checks):
+            return None
+        return lambda v: any(c(v) for c in checks)
+
+    def _dict(d):
+        checks = []
+        for k in d:
+            if isinstance(d[k], list):
+                if d[k][0] == "and":
+                    checks.append(_all([_single(sk, k) for sk in d[k][1:]]))
+                else:
+                    checks.append(_any([_single(sk, k) for sk in d[k]]))
+            else:
+                checks.append(_single(d[k], k))
+        return _all(checks)
+
+    if isinstance(cond, list):
+        check = _any([_dict(d) for d in cond])
+    else:
+        check = _dict(cond)
+    if check is None:
+        return None
+
+    def _precond(lp, rp):
+        v = {k: f(lp, rp) for k, f in _substrings.items()}
+        v["lp"] = lp
+        v["rp"] = rp
+        return check(v)
+    return _precond
+
+
+def _expression(e, args):
+    ''' Compile python expression e from the yaml into a function of args '''
+    # FIXME: We assume our code in yaml is safe to eval
+    return eval(f"lambda {args}: ({e})", globals())
+
+
+def _compile_single(sk, k):
+    ''' Compile one condition check sk on variable k into a function of env '''
+    if (sk[0] == "_"):
+        # Pratyahara
+        p = sk[1:]
+        return lambda env: isInPratyahara(p, env[k])  # noqa: F405
+    elif (sk[0:2] == "$$"):
+        # function call
+        f = eval(sk[2:])
+        return lambda env: f(env[k])
+    elif (sk[0] == "$"):
+        # Variable
+        v = sk[1:]
+        return lambda env: isSavarna(env[v], env[k])  # noqa: F405
+    elif (sk[0] == "="):
+        # Raw equality
+        t = sk[1:]
+        return lambda env: t == env[k].canonical()
+    elif (sk[0:2] == "!="):
+        # Raw inequality
+        t = sk[2:]
+        return lambda env: t != env[k].canonical()
+    elif (sk[0:2] == "?!"):  # Tag false check
+        t = sk[2:]
+        return lambda env: not env[k].hasTag(t)
+    elif (sk[0] == "?"):  # Tag check
+        t = sk[1:]
+        return lambda env: env[k].hasTag(t)
+    elif (sk[0] == "+"):  # It check
+        t = sk[1:]
+        return lambda env: env[k].hasTag("pratyaya") and env[k].hasIt(t)
+    else:
+        return lambda env: isSavarna(sk, env[k])  # noqa: F405
+
+
+def _compile_cond(cond):
+    '''
+    Compile a sutra condition into a function of env
+
+    A condition is a dict of variable: check(s), all of which must
+    hold. A list of checks for a variable is an or, unless its first
+    element is "and". A list of conditions is an or.
+    '''
+    def _dict(d):
+        checks = []
+        for k in d:
+            if isinstance(d[k], list):
+                if d[k][0] == "and":
+                    _and = tuple(_compile_single(sk, k) for sk in d[k][1:])
+                    checks.append(lambda env, _and=_and: all(c(env) for c in _and))
+                else:
+                    _or = tuple(_compile_single(sk, k) for sk in d[k])
+                    checks.append(lambda env, _or=_or: any(c(env) for c in _or))
+            else:
+                checks.append(_compile_single(d[k], k))
+        if len(checks) == 1:
+            return checks[0]
+        checks = tuple(checks)
+        return lambda env: all(c(env) for c in checks)
+
+    if isinstance(cond, list):
+        conds = tuple(_dict(d) for d in cond)
+        return lambda env: any(c(env) for c in conds)
+    return _dict(cond)
+
+
+def _compile_xform(xdict):
+    ''' Compile a sutra xform into a function of env returning [lp, rp] strings '''
+    # Transforms for predefined variables, None meaning ""
+    xf = {}
+    for k in ["l", "r", "lc", "rc"]:
+        if k in xdict:
+            if xdict[k] is not None:
+                xf[k] = _expression(xdict[k], "l, r, lc, rc, env")
+            else:
+                xf[k] = None
+
+    def _xform(env):
+        v = {k: env[k].canonical() for k in ["l", "r", "lc", "rc"]}
+        # Transforms see the variables before any transform
+        _v = {k: ("" if f is None else f(v["l"], v["r"], v["lc"], v["rc"], env))
+              for k, f in xf.items()}
+        v.update(_v)
+        return [v["lc"]+v["l"], v["r"]+v["rc"]]
+    return _xform
+
+
+def _compile_insert(idict):
+    ''' Compile a sutra insert into a function of env returning {index: object} '''
+    ins = [(i, _expression(idict[i], "env")) for i in idict]
+
+    def _insert(env):
+        return {i: f(env) for i, f in ins}
+    return _insert
+
+
+def _compile_domain(d):
+    ''' Compile (a list of) domains that enable a sutra into a function of domains '''
+    if isinstance(d, list):
+        return lambda domains: all(domains.isdomain(t) for t in d)
+    return lambda domains: domains.isdomain(d)
+
+
+def _compile_update(udict):
+    ''' Compile a sutra update into a function of env and domains '''
+    def _tag(sk):
+        # Set or remove one tag on env[k]
+        if sk[0:2] == "++":
+            t = sk[2:]
+            return lambda env, k: env[k].setIt(t)
+        elif sk[0:2] == "--":
+            t = sk[2:]
+            return lambda env, k: env[k].deleteIt(t)
+        elif sk[0] == "+":
+            t = sk[1:]
+            return lambda env, k: env[k].setTag(t)
+        elif sk[0] == "-":
+            t = sk[1:]
+
+            def _delete(env, k):
+                if env[k].hasTag(t):
+                    env[k].deleteTag(t)
+            return _delete
+        elif sk == "_lu":
+            return lambda env, k: env[k].luTags()
+        elif sk[0] == "=":  # Replace
+            f = _expression(sk[1:], "")  # Must be defined!
+
+            def _replace(env, k):
+                env[k] = f()
+            return _replace
+        return None
+
+    def _domain_single(sk, k):
+        # Update conditions check pratyaharas, variables and savarnas
+        if (sk[0] == "_"):
+            p = sk[1:]
+            return lambda env: isInPratyahara(p, env[k])  # noqa: F405
+        elif (sk[0] == "$"):
+            v = sk[1:]
+            return lambda env: isSavarna(env[v], env[k])  # noqa: F405
+        return lambda env: isSavarna(sk, env[k])  # noqa: F405
+
+    def _domain_cond(c):
+        checks = tuple(_domain_single(c[k], k) for k in c)
+        return lambda env: all(f(env) for f in checks)
+
+    ops = []
+    for k in ["olp", "orp", "lp", "rp"]:
+        if k in udict:
+            sks = udict[k] if isinstance(udict[k], list) else [udict[k]]
+            ops.extend((k, f) for f in map(_tag, sks) if f is not None)
+    domain_ops = []
+    if "domain" in udict:
+        st = udict["domain"]
+        for k in st:
+            cond = None
+            if "condition" in st[k]:
+                # List implies an or in condition
+                if isinstance(st[k]['condition'], list):
+                    conds = tuple(_domain_cond(c) for c in st[k]['condition'])
+                    cond = (lambda env, conds=conds: any(c(env) for c in conds))
+                else:
+                    cond = _domain_cond(st[k]['condition'])
+            domain_ops.append((k, cond, st[k]["value"]))
+
+    def _update(env, domains):
+        for k, f in ops:
+            f(env, k)
+        for k, cond, value in domain_ops:
+            if (cond is None) or cond(env):
+                setattr(domains, k, value)
+    return _update
+
 
 def process_yaml(y):
     '''
     Process yaml file to return sutras dict
 
+    Conditions, transforms, updates and inserts are compiled into
+    functions once, here.
+
     Inputs:
       y: Sutra Yaml
     Outputs
       sutra_dict: dict of sutras keyed by sutra id
     '''
-    logger.debug(f'Processing YAML {y}')
     sutra_dict = {}
     for s in y:
-        logger.debug(f"processing {s}")
         if "sutra" not in s:
             logger.error("No sutra name")
             assert False
@@ -38,7 +309,6 @@ def process_yaml(y):
                 s[c] = None
         if "bahiranga" not in s:
             s["bahiranga"] = 1
-        # svar = "sutra_"+s["id"].replace(".", "_")
         sname = s["sutra"]
         soverrides = None
         sopt = False
@@ -49,252 +319,23 @@ def process_yaml(y):
                 soverrides = [s["overrides"]]
             else:
                 soverrides = s["overrides"]
-            logger.debug(f"Sutra {s['id']} Overrides {soverrides}")
         scond = None
+        sprecond = None
         if s["condition"] is not None:
-            logger.debug("Processing Condition")
-
-            def _exec_cond(s):
-                logger.debug(f"Cond dict {s}")
-                # FIXME Fix variables after fixing sutra_engine
-
-                def _cond(env):
-                    def _c(env):
-                        # _s a dict
-                        # LHS = variable
-                        # RHS = _pratyahara , {variable}, or savarna
-                        x = True
-                        for k in _s:
-                            logger.debug(f"Checking cond {_s[k]} against {k}")
-
-                            def _cond_single(sk, k):
-                                if (sk[0] == "_"):
-                                    # Pratyahara
-                                    logger.debug(f"Checking pratyahara {sk[1:]} {k}")
-                                    _x = isInPratyahara(sk[1:], k)  # noqa: F405
-                                elif (sk[0:2] == "$$"):
-                                    # function call
-                                    logger.debug(f"Checking function {sk[2:]} {k}")
-                                    _x = eval(f"{sk[2:]}(k)")
-                                elif (sk[0] == "$"):
-                                    # Variable
-                                    logger.debug(f"Checking variable {sk[1:]} {k}")
-                                    _x = isSavarna(env[sk[1:]], k)  # noqa: F405
-                                elif (sk[0] == "="):
-                                    # Raw equality
-                                    logger.debug(f"Checking raw {sk[1:]} {k}")
-                                    _x = (sk[1:] == k.canonical())
-                                elif (sk[0:2] == "!="):
-                                    # Raw inequality
-                                    logger.debug(f"Checking raw inequality {sk[2:]} {k}")
-                                    _x = (sk[2:] != k.canonical())
-                                elif (sk[0:2] == "?!"):  # Tag false check
-                                    logger.debug(f"Checking tag false {sk[2:]} {k}")
-                                    _x = not k.hasTag(sk[2:])
-                                elif (sk[0] == "?"):  # Tag check
-                                    logger.debug(f"Checking tag {sk[1:]} {k}")
-                                    _x = k.hasTag(sk[1:])
-                                elif (sk[0] == "+"):  # It check
-                                    logger.debug(f"Checking it {sk[1:]} {k}")
-                                    _x = k.hasTag("pratyaya") and k.hasIt(sk[1:])
-                                else:
-                                    logger.debug(f"Checking savarna {sk} {k} ")
-                                    _x = isSavarna(sk, k)   # noqa: F405
-                                logger.debug(f"Return {_x}")
-                                return _x
-                            if isinstance(_s[k], list):
-                                logger.debug("List")
-                                if _s[k][0] == "and":
-                                    logger.debug("Checking and condition")
-                                    _x = True
-                                    for sk in _s[k][1:]:
-                                        _x = _x and _cond_single(sk, env[k])
-                                else:
-                                    _x = False
-                                    for sk in _s[k]:
-                                        _x = _x or _cond_single(sk, env[k])
-                            else:
-                                logger.debug("Single")
-                                _x = _cond_single(_s[k], env[k])
-                            logger.debug(f"Got {_x}")
-                            x = x and _x
-                        return x
-                    # List implies an or condition
-                    if isinstance(s, list):
-                        _ret = False
-                        for _s in s:
-                            _ret = _ret or _c(env)
-                        return _ret
-                    else:
-                        _s = s
-                        return _c(env)
-                return _cond
-
-            scond = _exec_cond(s["condition"])
-
+            scond = _compile_cond(s["condition"])
+            sprecond = _precondition(s["condition"])
         sxform = None
         if s["xform"] is not None:
-            logger.debug("Processing Xform")
-
-            def _exec_xform(s):
-                logger.debug(f"Xform dict {s}")
-                xdict = s
-                # FIXME Fix variables after fixing sutra_engine
-
-                def _xform(env):
-                    # Don't Remove - keep for debug
-                    # logger.debug(f"Env {env}")
-                    # for k in env:
-                    #    logger.debug(f"{k} {type(env[k])}")
-                    _l = l = env["l"].canonical()  # noqa: E741, F841
-                    _r = r = env["r"].canonical()  # noqa: E741, F841
-                    _lc = lc = env["lc"].canonical()  # noqa: E741, F841
-                    _rc = rc = env["rc"].canonical()  # noqa: E741, F841
-                    logger.debug(f"Xform dict {xdict}")
-                    logger.debug(f"Before: {_lc} {_l} {_r} {_rc}")
-                    # Execute transforms for predefined variables
-                    # FIXME: We assume our code in xform is safe to eval
-                    if "l" in xdict:
-                        if xdict["l"] is not None:
-                            _l = eval(xdict["l"])
-                        else:
-                            _l = ""
-                    if "r" in xdict:
-                        if xdict["r"] is not None:
-                            _r = eval(xdict["r"])
-                        else:
-                            _r = ""
-                    if "lc" in xdict:
-                        if xdict["lc"] is not None:
-                            _lc = eval(xdict["lc"])
-                        else:
-                            _lc = ""
-                    if "rc" in xdict:
-                        if xdict["rc"] is not None:
-                            _rc = eval(xdict["rc"])
-                        else:
-                            _rc = ""
-                    logger.debug(f"After {_lc} {_l} {_r} {_rc}")
-                    ret = [_lc+_l, _r+_rc]
-                    return ret
-                return _xform
-            sxform = _exec_xform(s["xform"])
-            logger.debug(f"Xform def {sxform}")
+            sxform = _compile_xform(s["xform"])
         sinsert = None
         if s["insert"] is not None:
-            logger.debug("Processing insert")
-
-            def _exec_insert(s):
-                logger.debug(f"insert dict {s}")
-                idict = s
-
-                def _insert(env):
-                    _r = {}
-                    for i in idict:
-                        logger.debug(f"Insert {i} {idict[i]}")
-                        _r[i] = eval(idict[i])
-                    return _r
-                return _insert
-            sinsert = _exec_insert(s["insert"])
-            logger.debug(f"Insert def {sinsert}")
+            sinsert = _compile_insert(s["insert"])
         sdom = None
         if s["domain"] is not None:
-            logger.debug("Processing domain")
-
-            def _exec_trig(s):
-                logger.debug(f"Trig {s}")
-
-                def _trig(domains):
-                    # list of domains
-                    logger.debug(f"Domain checks {s}")
-                    if isinstance(s, list):
-                        x = True
-                        for t in s:
-                            x = x and domains.isdomain(t)
-                    else:
-                        return domains.isdomain(s)
-                return _trig
-            sdom = _exec_trig(s["domain"])
+            sdom = _compile_domain(s["domain"])
         supdate = None
         if s["update"] is not None:
-            logger.debug("Processing update")
-
-            def _exec_update(s):
-                logger.debug(f"Update {s}")
-
-                def _update(env, domains):
-                    def _c(env):
-                        # _s a dict
-                        # LHS = variable
-                        # RHS = _pratyahara , {variable}, or savarna
-                        x = True
-                        for k in _s:
-                            logger.debug(f"Checking cond {_s[k]} against {k}")
-                            if (_s[k][0] == "_"):
-                                # Pratyahara
-                                logger.debug(f"Checking pratyahara {_s[k][1:]}")
-                                _x = isInPratyahara(_s[k][1:], env[k])  # noqa: F405
-                            elif (_s[k][0] == "$"):
-                                # Variable
-                                logger.debug(f"Checking variable {_s[k][1:]} ")
-                                _x = isSavarna(env[_s[k][1:]], env[k])  # noqa: F405
-                            else:
-                                _x = isSavarna(_s[k], env[k])  # noqa: F405
-                            logger.debug(f"Got {_x}")
-                            x = x and _x
-                        return x
-
-                    for k in ["olp", "orp", "lp", "rp"]:
-                        if k in s.keys():
-                            # Set or remove one tag
-                            def _tag(k, sk):
-                                if sk[0:2] == "++":
-                                    logger.debug(f"Setting {k} it {sk[2:]}")
-                                    env[k].setIt(sk[2:])
-                                elif sk[0:2] == "--":
-                                    logger.debug(f"Removing {k} it {sk[1:]}")
-                                    env[k].deleteIt(sk[2:])
-                                elif sk[0] == "+":
-                                    logger.debug(f"Setting {k} tag {sk[1:]}")
-                                    env[k].setTag(sk[1:])
-                                elif sk[0] == "-":
-                                    logger.debug(f"Removing {k} tag {sk[1:]}")
-                                    if env[k].hasTag(sk[1:]):
-                                        env[k].deleteTag(sk[1:])
-                                elif sk == "_lu":
-                                    logger.debug("Removing all tags ")
-                                    env[k].luTags()
-                                elif sk[0] == "=":  # Replace
-                                    logger.debug(f"Replacing {k} with {sk[1:]} {eval(sk[1:])}")
-                                    env[k] = eval(sk[1:])  # Must be defined!
-
-                            # Possibly set/remove multiple tags
-                            if isinstance(s[k], list):
-                                for sk in s[k]:
-                                    _tag(k, sk)
-                            else:
-                                _tag(k, s[k])
-
-                    if "domain" in s.keys():
-                        st = s["domain"]
-                        for k in st:
-                            logger.debug(f"Updating domain {k} {st[k]}")
-                            cond = True
-                            if "condition" in st[k]:
-                                logger.debug(f"Update condition check {st[k]['condition']}")
-                                # List implies an or in condition
-                                if isinstance(st[k]['condition'], list):
-                                    cond = False
-                                    for _s in st[k]['condition']:
-                                        cond = cond or _c(env)
-                                else:
-                                    _s = st[k]['condition']
-                                    cond = _c(env)
-                                logger.debug(f"Check got {cond}")
-                            if cond:
-                                setattr(domains, k, st[k]["value"])
-                return _update
-            supdate = _exec_update(s["update"])
+            supdate = _compile_update(s["update"])
         if s["id"] in sutra_dict:
             logger.error(f"Duplicate Sutra {s['id']} - {sutra_dict[s['id']]} and {sname}")
             assert False
@@ -306,6 +347,7 @@ def process_yaml(y):
                                       update=supdate,
                                       optional=sopt,
                                       bahiranga=s["bahiranga"],
-                                      overrides=soverrides)
+                                      overrides=soverrides,
+                                      precond=sprecond)
 
     return sutra_dict
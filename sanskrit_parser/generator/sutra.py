@@ -5,12 +5,15 @@ Operational Sutras
 from indic_transliteration import sanscript
 from sanskrit_parser.base.sanskrit_base import SanskritImmutableString
 from decimal import Decimal
-from copy import deepcopy
+from functools import lru_cache
 from sanskrit_parser.generator.paninian_object import PaninianObject
 
 import logging
 logger = logging.getLogger(__name__)
 
+# Candidate sutra lists memoized by SutraIndex
+CANDIDATE_CACHE_SIZE = 65536
+
 
 # Global Domains
 class GlobalDomains(object):
@@ -79,13 +82,18 @@ class Sutra(object):
 
 class LRSutra(Sutra):
     def __init__(self, name, aps, cond, xform, insert=None, domain=None,
-                 update=None, optional=False, bahiranga=1, overrides=None):
+                 update=None, optional=False, bahiranga=1, overrides=None,
+                 precond=None):
         '''
         Sutra Class that expects a left and right input
+
+        precond, if given, is a cheap check on the strings of the left and
+        right inputs, that must hold for cond to hold
         '''
         super().__init__(name, aps, optional, overrides)
         self.domain = domain
         self.cond = cond
+        self.precond = precond
         self.xform = xform
         self.update_f = update
         self.insertx = insert
@@ -94,18 +102,25 @@ class LRSutra(Sutra):
     def inAdhikara(self, context):
         return self.adhikara(context)
 
-    def isTriggered(self, s1, s2, domains):
-        logger.debug(f"Checking {self} View: {s1} {s2}")
-        env = _env(s1, s2)
+    def inDomain(self, domains):
         if self.domain is not None:
-            t = self.domain(domains)
+            return self.domain(domains)
         else:
-            t = domains.isdomain("standard")
+            return domains.isdomain("standard")
+
+    def mayTrigger(self, l1, l2):
+        ''' False if the sutra cannot trigger on inputs with strings l1, l2 '''
+        return (self.precond is None) or self.precond(l1, l2)
+
+    def isTriggered(self, s1, s2, domains):
+        logger.debug("Checking %s View: %s %s", self, s1, s2)
+        env = _env(s1, s2)
+        t = self.inDomain(domains)
         if self.cond is not None:
             c = self.cond(env)
         else:
             c = True
-        logger.debug(f"Check Result {c and t} for {self}")
+        logger.debug("Check Result %s for %s", c and t, self)
         return c and t
 
     def update(self, s1, s2, o1, o2, domains):
@@ -118,8 +133,8 @@ class LRSutra(Sutra):
 
     def operate(self, s1, s2):
         # We take the string tuple returned, and update s1, s2
-        rs1 = deepcopy(s1)
-        rs2 = deepcopy(s2)
+        rs1 = s1.copy()
+        rs2 = s2.copy()
         if self.xform is not None:
             env = _env(s1, s2)
             ret = self.xform(env)
@@ -143,6 +158,45 @@ class LRSutra(Sutra):
             return(s1, s2)
 
 
+class SutraIndex(object):
+    """
+    Dispatch index over a list of LRSutras
+
+    Sutras are bucketed by the domains they are active in, and filtered
+    by their preconditions on the (SLP1) strings of the left and right
+    inputs. Candidate lists are memoized, so most windows are a lookup.
+    Sutras that pass still need isTriggered.
+    """
+    def __init__(self, sutra_list):
+        self.sutras = list(sutra_list)
+        self.position = {s.aps: i for i, s in enumerate(self.sutras)}
+        # active domains -> sutras active in them
+        self._by_domain = {}
+        self._candidates = lru_cache(maxsize=CANDIDATE_CACHE_SIZE)(self._candidates)
+
+    def in_domain(self, domains):
+        ''' Sutras active in domains, in list order '''
+        return self._by_domain[self._domain_key(domains)]
+
+    def _domain_key(self, domains):
+        key = tuple(domains.active_domain())
+        if key not in self._by_domain:
+            self._by_domain[key] = tuple(s for s in self.sutras if s.inDomain(domains))
+        return key
+
+    def candidates(self, domains, l1, l2):
+        ''' Sutras active in domains that may trigger on strings l1, l2, in list order
+
+            Returns:
+                (tuple, frozenset) of the same sutras
+        '''
+        return self._candidates(self._domain_key(domains), l1, l2)
+
+    def _candidates(self, key, l1, l2):
+        r = tuple(s for s in self._by_domain[key] if s.mayTrigger(l1, l2))
+        return r, frozenset(r)
+
+
 def _env(s1, s2):
     # Helper function to define execution environment
     env = {}
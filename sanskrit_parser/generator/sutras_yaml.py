@@ -2,23 +2,106 @@
 """
 ac sandhi sutras generated through YAML processing
 
+Sutras are loaded on first use of sutra_list or sutra_dict. Parsing
+sutras.yaml is slow, so the parsed yaml is cached in CACHE_DIR (see
+util.data_manager, shared with the sandhi tables), in a file named by the
+hash of sutras.yaml. Editing sutras.yaml invalidates it.
+
+Command line usage
+==================
+
+Build the cache, eg: in a docker image or before starting test workers::
+
+    $ python -m sanskrit_parser.generator.sutras_yaml
+
 @author: kmadathil
 """
-from sanskrit_parser.generator.process_yaml import process_yaml
-import yaml
+import hashlib
+import os
 import os.path
+import pickle
+
+from sanskrit_parser.util.data_manager import CACHE_DIR
 
 import logging
-#logger = logging.getLogger(__name__)
+logger = logging.getLogger(__name__)
+
+yaml_file = os.path.join(os.path.dirname(__file__), "sutras.yaml")
+
+_sutra_dict = None
+_sutra_list = None
+
+
+def cache_file(data, cache_dir=None):
+    ''' Cache file for yaml file contents data '''
+    h = hashlib.sha256(data).hexdigest()[:16]
+    return os.path.join(cache_dir or CACHE_DIR, f"sutras-{h}.pkl")
+
+
+def load_yaml(path=yaml_file, cache_dir=None):
+    '''
+    Parsed sutra yaml, from the cache if possible
+
+    Inputs:
+      path: Sutra yaml file
+      cache_dir: Cache directory (def=CACHE_DIR)
+    Outputs
+      list of sutra dicts, as from yaml.load
+    '''
+    with open(path, "rb") as f:
+        data = f.read()
+    cf = cache_file(data, cache_dir)
+    try:
+        with open(cf, "rb") as f:
+            return pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        pass
+    import yaml
+    loader = getattr(yaml, "CFullLoader", yaml.FullLoader)
+    y = yaml.load(data.decode("utf-8"), Loader=loader)
+    try:
+        os.makedirs(os.path.dirname(cf), exist_ok=True)
+        _write_cache(cf, y)
+    except OSError as e:
+        logger.info(f"Cannot cache parsed sutras ({e})")
+    return y
+
+
+def _write_cache(path, y):
+    # Write and rename, so concurrent loaders never see a partial file
+    tmp = f"{path}.{os.getpid()}"
+    try:
+        with open(tmp, "wb") as f:
+            pickle.dump(y, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def load():
+    ''' Load the sutras if not loaded, and return sutra_dict '''
+    global _sutra_dict, _sutra_list
+    if _sutra_dict is None:
+        from sanskrit_parser.generator.process_yaml import process_yaml
+        _sutra_dict = process_yaml(load_yaml())
+        _sutra_list = _sutra_dict.values()
+    return _sutra_dict
+
+
+def __getattr__(name):
+    if name == "sutra_dict":
+        return load()
+    if name == "sutra_list":
+        load()
+        return _sutra_list
+    raise AttributeError(f"module {__name__} has no attribute {name}")
+
 
-sutra_list = []
-sutra_dict = {}
+__all__ = ["sutra_list", "sutra_dict"]  # noqa: F822 - loaded by __getattr__
 
-f = open(os.path.join(os.path.dirname(__file__), "sutras.yaml"), "r", encoding="utf-8")
-y = yaml.load(f, Loader=yaml.FullLoader)
-sutra_dict = process_yaml(y)
-sutra_list = sutra_dict.values()
-# logger.info(sutra_dict)
-f.close()
 
-__all__ = ["sutra_list", "sutra_dict"]
+if __name__ == "__main__":
+    y = load_yaml()
+    print(f"Cached {len(y)} sutras in {cache_file(open(yaml_file, 'rb').read())}")
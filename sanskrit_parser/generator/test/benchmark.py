@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+"""
+Generator benchmark
+
+Derives the reference paradigms of vibhaktis_list, by stem class, and the
+sandhi tests of manual_list, and reports, for each class
+
+  * wall time per form (best of a few runs)
+  * sutras evaluated (isTriggered calls) and fired (operate calls) per form
+  * PaninianObject copies and deepcopies per form
+  * forms that do not match the reference
+
+Counts are deterministic, so any increase over the saved baseline is a
+regression. Times depend on the machine, and are compared with a
+tolerance. Save a new baseline along with a change that is expected to
+change the counts (eg: new sutras).
+
+Usage
+=====
+
+::
+
+    $ cd sanskrit_parser/generator/test
+    $ python benchmark.py                       # Compare with the baseline
+    $ python benchmark.py ajanta_pum --repeat 5
+    $ python benchmark.py --check               # Exit status 1 on a regression
+    $ python benchmark.py --save                # Save a new baseline
+
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from indic_transliteration import sanscript
+from sanskrit_parser.generator import prakriya
+from sanskrit_parser.generator.paninian_object import PaninianObject
+from sanskrit_parser.generator.prakriya import Prakriya, PrakriyaVakya
+from sanskrit_parser.generator.sutra import LRSutra
+from sanskrit_parser.generator.sutras_yaml import sutra_list
+
+from conftest import _test, generate_vibhakti, prakriya_inputs
+from manual_list import test_list_slp1, test_list_devanagari
+from vibhaktis_list import ajanta, halanta, viBakti, prAtipadika, encoding
+
+CLASSES = ["ajanta_pum", "ajanta_strI", "ajanta_napum", "halanta", "sandhi"]
+# Counted work
+COUNTS = ["evaluated", "fired", "copies", "deepcopies"]
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_baseline.json")
+# Allowed slowdown over the baseline time per form
+TOLERANCE = 0.25
+
+
+def cases(cls):
+    ''' (test, encoding) of the tests in stem class cls '''
+    if cls == "sandhi":
+        return ([(s, sanscript.SLP1) for s in test_list_slp1] +
+                [(s, sanscript.DEVANAGARI) for s in test_list_devanagari])
+    if cls == "halanta":
+        stems = [v for linga in halanta for v in halanta[linga]]
+    else:
+        stems = ajanta[cls.split("_")[1]]
+    t = []
+    for v in stems:
+        enc = encoding.get(v, sanscript.DEVANAGARI)
+        t.extend((s, enc) for s in generate_vibhakti(prAtipadika[v], viBakti[v], enc))
+    return t
+
+
+def derive(tests):
+    ''' Outputs of the prakriyas of tests, and the time taken by them '''
+    inputs = [PrakriyaVakya(prakriya_inputs(s, enc)) for s, enc in tests]
+    outputs = []
+    # As timeit does, keep collections out of the time
+    gc.collect()
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        for i in inputs:
+            p = Prakriya(sutra_list, i)
+            p.execute()
+            outputs.append(p.output())
+        seconds = time.perf_counter() - start
+    finally:
+        gc.enable()
+    return outputs, seconds
+
+
+@contextmanager
+def counting():
+    ''' Count sutras evaluated and fired, and copies, while in this context '''
+    counts = Counter()
+    saved = (LRSutra.isTriggered, LRSutra.operate, PaninianObject.copy, prakriya.deepcopy)
+
+    def _counted(name, f):
+        def _f(*args, **kwargs):
+            counts[name] += 1
+            return f(*args, **kwargs)
+        return _f
+
+    LRSutra.isTriggered = _counted("evaluated", saved[0])
+    LRSutra.operate = _counted("fired", saved[1])
+    PaninianObject.copy = _counted("copies", saved[2])
+    prakriya.deepcopy = _counted("deepcopies", saved[3])
+    try:
+        yield counts
+    finally:
+        LRSutra.isTriggered, LRSutra.operate, PaninianObject.copy, prakriya.deepcopy = saved
+
+
+def bench(cls, repeat=3):
+    '''
+    Benchmark stem class cls
+
+    Outputs
+      dict of forms, failed, seconds (best total) and COUNTS (totals)
+    '''
+    tests = cases(cls)
+    # Counted first, which also warms up the sutra index caches
+    with counting() as counts:
+        outputs = derive(tests)[0]
+    # Timed without the counting wrappers
+    seconds = min(derive(tests)[1] for _ in range(repeat))
+    r = {"forms": len(tests),
+         "failed": sum(not _test(o, s, enc) for o, (s, enc) in zip(outputs, tests)),
+         "seconds": round(seconds, 4)}
+    r.update((c, counts[c]) for c in COUNTS)
+    return r
+
+
+def regressions(results, baseline, tolerance=TOLERANCE):
+    ''' Regressions of results (cls -> bench output) over baseline '''
+    reg = []
+    for cls, r in results.items():
+        b = baseline.get(cls)
+        if b is None:
+            continue
+        if r["forms"] != b["forms"]:
+            reg.append(f"{cls}: {r['forms']} forms, baseline has {b['forms']}. Save a new baseline")
+            continue
+        if r["failed"] > b["failed"]:
+            reg.append(f"{cls}: {r['failed']} forms failed, baseline {b['failed']}")
+        for c in COUNTS:
+            if r[c] > b[c]:
+                reg.append(f"{cls}: {c} {r[c]}, baseline {b[c]}")
+        if r["seconds"] > b["seconds"] * (1 + tolerance):
+            reg.append(f"{cls}: {_ms(r)} ms per form, baseline {_ms(b)}")
+    return reg
+
+
+def _ms(r):
+    return f"{r['seconds'] * 1000 / r['forms']:.2f}"
+
+
+def _delta(v, b):
+    if not b:
+        return ""
+    return f" ({(v - b) / b:+.0%})"
+
+
+def report(results, baseline):
+    ''' Print results, with changes over baseline '''
+    for cls, r in results.items():
+        b = baseline.get(cls, {})
+        print(f"{cls}: {r['forms']} forms, {r['failed']} failed")
+        print(f"  ms per form {_ms(r)}{_delta(r['seconds'], b.get('seconds'))}")
+        for c in COUNTS:
+            print(f"  {c} per form {r[c] / r['forms']:.1f}{_delta(r[c], b.get(c))}")
+
+
+def load_baseline(path=BASELINE):
+    ''' Baseline results, by class '''
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)["classes"]
+
+
+def save_baseline(results, path=BASELINE):
+    ''' Save results as the baseline of their classes, keeping other classes '''
+    classes = load_baseline(path)
+    classes.update(results)
+    with open(path, "w") as f:
+        json.dump({"python": platform.python_version(), "machine": platform.machine(),
+                   "classes": classes}, f, indent=1, sort_keys=True)
+        f.write("\n")
+
+
+def getArgs(argv=None):
+    parser = argparse.ArgumentParser(description="Generator benchmark")
+    parser.add_argument("classes", nargs="*",
+                        help=f"Stem classes to benchmark, of {', '.join(CLASSES)} (def: all)")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs, best is reported")
+    parser.add_argument("--baseline", default=BASELINE, help="Baseline file")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE,
+                        help="Allowed fractional slowdown over the baseline time per form")
+    parser.add_argument("--save", action="store_true", help="Save results as the baseline")
+    parser.add_argument("--check", action="store_true", help="Exit with status 1 on a regression")
+    args = parser.parse_args(argv)
+    unknown = [c for c in args.classes if c not in CLASSES]
+    if unknown:
+        parser.error(f"unknown stem classes {', '.join(unknown)}")
+    return args
+
+
+def main(argv=None):
+    args = getArgs(argv)
+    baseline = load_baseline(args.baseline)
+    results = {cls: bench(cls, args.repeat) for cls in (args.classes or CLASSES)}
+    report(results, baseline)
+    if args.save:
+        save_baseline(results, args.baseline)
+        print(f"Saved baseline to {args.baseline}")
+        return 0
+    reg = regressions(results, baseline, args.tolerance)
+    for r in reg:
+        print(f"Regression: {r}")
+    return 1 if (reg and args.check) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -46,10 +46,10 @@ def _test(output, s, enc):
     return (set(j) == set(_s))
 
 
-def run_test(s, sutra_list, encoding=sanscript.SLP1, verbose=False):
+def prakriya_inputs(s, encoding=sanscript.SLP1):
+    """ Prakriya inputs of test s (all but its last, reference, element)
+    """
     pl = []
-    print(f"Testing {s}")
-    # Assemble list of inputs
     for i in range(len(s)-1):
         def _gen_obj(s, i):
             if isinstance(s[i], str):
@@ -74,6 +74,13 @@ def run_test(s, sutra_list, encoding=sanscript.SLP1, verbose=False):
             return l
         l = _gen_obj(s, i)  # noqa: E741
         pl.append(l)
+    return pl
+
+
+def run_test(s, sutra_list, encoding=sanscript.SLP1, verbose=False):
+    print(f"Testing {s}")
+    # Assemble list of inputs
+    pl = prakriya_inputs(s, encoding)
     p = Prakriya(sutra_list, PrakriyaVakya(pl))
     p.execute()
     if verbose:
@@ -0,0 +1,38 @@
+from sanskrit_parser.generator.paninian_object import PaninianObject
+from sanskrit_parser.generator.sutra import LRSutra
+
+from benchmark import bench, counting, regressions, COUNTS
+
+
+def test_bench():
+    isTriggered = LRSutra.isTriggered
+    copy = PaninianObject.copy
+    r = bench("halanta", repeat=1)
+    # Wrappers are removed
+    assert (LRSutra.isTriggered, PaninianObject.copy) == (isTriggered, copy)
+    assert r["failed"] == 0
+    assert r["forms"] > 0
+    assert 0 < r["fired"] < r["evaluated"]
+    assert r["copies"] > 0
+    # Counts are deterministic
+    r1 = bench("halanta", repeat=1)
+    assert [r[c] for c in COUNTS] == [r1[c] for c in COUNTS]
+
+
+def test_counting():
+    p = PaninianObject("rAma")
+    with counting() as counts:
+        p.copy()
+    p.copy()
+    assert counts["copies"] == 1
+
+
+def test_regressions():
+    b = {"forms": 10, "failed": 0, "seconds": 1.0, "evaluated": 100, "fired": 10, "copies": 50, "deepcopies": 20}
+    assert regressions({"halanta": dict(b)}, {"halanta": b}) == []
+    # Faster, within tolerance, or doing less is not a regression
+    assert regressions({"halanta": dict(b, seconds=1.2, copies=40)}, {"halanta": b}) == []
+    assert regressions({"halanta": dict(b)}, {}) == []
+    assert len(regressions({"halanta": dict(b, seconds=1.3, evaluated=101)}, {"halanta": b})) == 2
+    assert regressions({"halanta": dict(b, seconds=1.3)}, {"halanta": b}, tolerance=0.5) == []
+    assert len(regressions({"halanta": dict(b, forms=11)}, {"halanta": b})) == 1
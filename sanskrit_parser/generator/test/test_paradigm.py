@@ -0,0 +1,56 @@
+from sanskrit_parser.generator.pratipadika import rAma, hari, tri, ramA
+from sanskrit_parser.generator.prakriya import Prakriya, PrakriyaVakya, DerivationMemo
+from sanskrit_parser.generator.paradigm import generate_vibhaktis, iter_vibhaktis, vibhakti_tasks
+from sanskrit_parser.generator.sutras_yaml import sutra_list
+
+
+def _forms(table):
+    return [[sorted("".join(str(x) for x in y) for y in o) for o in vi] for vi in table]
+
+
+def _tree(d):
+    # Node ids are global, so differ between prakriyas
+    return [str(d['sutra']), str(d['inputs']), str(d['outputs']), d['window'],
+            d['other_sutras'], [_tree(c) for c in d['children']]]
+
+
+def test_generate_vibhaktis():
+    ps = [rAma, hari, tri, ramA]
+    tables = generate_vibhaktis(ps, processes=2, chunksize=5)
+    assert len(tables) == len(ps)
+    for p, t in zip(ps, tables):
+        assert _forms(t) == _forms(generate_vibhaktis([p], processes=1)[0])
+    assert _forms(tables[0])[0][0] == ["rAmaH."]
+    # nityabahuvacana
+    assert [len(vi) for vi in tables[2]] == [1] * 8
+
+
+def test_iter_vibhaktis():
+    ps = [rAma, hari, tri, ramA]
+    read = []
+
+    def _ps():
+        for p in ps * 10:
+            read.append(p)
+            yield p
+    it = iter_vibhaktis(_ps(), processes=2, chunksize=1)
+    forms = next(it)
+    # Only a bounded window of pratipadikas is read ahead
+    assert len(read) <= 2 * 2 + 1
+    assert [(ix, jx) for ix, jx, o in forms] == [(ix, jx) for ix, jx, t in vibhakti_tasks(rAma)]
+    it.close()
+    assert len(list(iter_vibhaktis(ps, processes=2, chunksize=3))) == len(ps)
+
+
+def test_derivation_memo():
+    memo = DerivationMemo()
+    for p in [rAma, ramA, rAma]:
+        for ix, jx, t in vibhakti_tasks(p):
+            p0 = Prakriya(sutra_list, PrakriyaVakya(t))
+            p0.execute()
+            p1 = Prakriya(sutra_list, PrakriyaVakya(t), memo)
+            p1.execute()
+            assert _forms([[p1.output()]]) == _forms([[p0.output()]])
+            assert _tree(p1.dict()['root']) == _tree(p0.dict()['root'])
+    # The second rAma table is all replayed
+    assert memo.hits >= memo.misses / 2
@@ -0,0 +1,35 @@
+from sanskrit_parser.generator.prakriya import PrakriyaNode, PrakriyaTree
+
+
+def test_tree():
+    t = PrakriyaTree()
+    r = PrakriyaNode([], [], "Prakriya Start")
+    t.add_node(r, root=True)
+    a = PrakriyaNode([], [], "a")
+    b = PrakriyaNode([], [], "b")
+    c = PrakriyaNode([], [], "c")
+    # Optional: r stays a leaf
+    t.add_child(r, a, opt=True)
+    t.add_child(r, b)
+    t.add_child(a, c)
+    assert t.get_leaves() == [b, c]
+    assert t.children(r) == [a, b]
+    assert (t.parent(c), t.parent(a), t.parent(r)) == (a, r, None)
+    assert t.is_leaf(b) and not t.is_leaf(a)
+    assert len({r, a, b, c, a}) == 4
+    assert a != PrakriyaNode([], [], "a")
+
+
+def test_output_order():
+    # Optional sutras make yUza derivations branch. Output order
+    # follows the order leaves are run in
+    from sanskrit_parser.generator.prakriya import Prakriya, PrakriyaVakya
+    from sanskrit_parser.generator.pratipadika import yUza
+    from sanskrit_parser.generator.pratyaya import sups, avasAna
+    from sanskrit_parser.generator.sutras_yaml import sutra_list
+
+    def _forms(p):
+        p.execute()
+        return ["".join(str(x) for x in o) for o in p.output()]
+    assert _forms(Prakriya(sutra_list, PrakriyaVakya([(yUza, sups[2][1]), avasAna]))) == ['yUzaByAm.', 'yUzAByAm.']
+    assert _forms(Prakriya(sutra_list, PrakriyaVakya([(yUza, sups[3][2]), avasAna]))) == ['yUzaByaH.', 'yUzeByaH.']
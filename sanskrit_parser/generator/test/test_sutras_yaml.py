@@ -0,0 +1,65 @@
+import os
+
+import pytest
+import yaml
+
+from sanskrit_parser.generator import sutras_yaml
+from sanskrit_parser.generator.sutras_yaml import cache_file, load_yaml, yaml_file
+from sanskrit_parser.util import data_manager
+
+
+def _data():
+    with open(yaml_file, "rb") as f:
+        return f.read()
+
+
+def test_cache(tmp_path):
+    cache_dir = str(tmp_path)
+    parsed = yaml.load(_data().decode("utf-8"), Loader=yaml.FullLoader)
+    # Miss: parsed and cached
+    assert load_yaml(cache_dir=cache_dir) == parsed
+    cf = cache_file(_data(), cache_dir)
+    assert os.listdir(cache_dir) == [os.path.basename(cf)]
+    # Hit: the same result, from the cache
+    mtime = os.stat(cf).st_mtime_ns
+    assert load_yaml(cache_dir=cache_dir) == parsed
+    assert os.stat(cf).st_mtime_ns == mtime
+
+
+def test_cache_file(tmp_path):
+    data = _data()
+    assert cache_file(data, str(tmp_path)) == cache_file(bytes(data), str(tmp_path))
+    assert cache_file(data + b"\n", str(tmp_path)) != cache_file(data, str(tmp_path))
+    assert os.path.dirname(cache_file(data, str(tmp_path))) == str(tmp_path)
+    # The data files cache, by default
+    assert os.path.dirname(cache_file(data)) == data_manager.CACHE_DIR
+
+
+def test_edited_yaml(tmp_path):
+    path = tmp_path / "sutras.yaml"
+    path.write_bytes(_data())
+    cache_dir = str(tmp_path / "cache")
+    y = load_yaml(str(path), cache_dir)
+    # Editing the yaml invalidates the cached parse
+    path.write_bytes(_data().replace(b"\n", b"\n\n", 1))
+    assert load_yaml(str(path), cache_dir) == y
+    assert len(os.listdir(cache_dir)) == 2
+
+
+def test_failed_write(tmp_path, monkeypatch):
+    def dump(*args, **kwargs):
+        raise OSError("disk full")
+    monkeypatch.setattr(sutras_yaml.pickle, "dump", dump)
+    y = load_yaml(cache_dir=str(tmp_path))
+    assert len(y) > 0
+    # No cache, and no temporary file left behind
+    assert os.listdir(tmp_path) == []
+
+
+def test_lazy_load():
+    d = sutras_yaml.sutra_dict
+    # Loaded once
+    assert sutras_yaml.load() is d
+    assert list(sutras_yaml.sutra_list) == list(d.values())
+    with pytest.raises(AttributeError):
+        sutras_yaml.sutra_set
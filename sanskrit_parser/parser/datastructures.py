@@ -6,7 +6,7 @@
     @author: Karthik Madathil (github: @kmadathil)
 """
 from indic_transliteration import sanscript
-from sanskrit_parser.base.sanskrit_base import SanskritObject, SanskritImmutableString
+from sanskrit_parser.base.sanskrit_base import SanskritObject, register_vocabulary, transcode
 import networkx as nx
 from itertools import islice, product
 import logging
@@ -17,6 +17,8 @@ import time
 from collections import defaultdict
 from os.path import dirname, basename, splitext, join
 from sanskrit_parser.util import lexical_scorer
+from sanskrit_parser.util import dot
+from sanskrit_parser.util import metrics
 from sanskrit_parser.util.disjoint_set import DisjointSet
 from sanskrit_parser.util.DhatuWrapper import DhatuWrapper
 from functools import reduce
@@ -106,6 +108,10 @@ class SandhiGraph(object):
         self.roots = []
 
     def score_graph(self):
+        with metrics.timed("graph_scoring"):
+            self._score_graph()
+
+    def _score_graph(self):
         edges = self.G.edges()
         edges_list = []
         edges_to_score = []
@@ -134,17 +140,14 @@ class SandhiGraph(object):
                sort (bool)                 : If True (default), sort paths
                                              in ascending order of length
         """
-        if self.roots:
-            self.lock_start()
-        if score:
-            self.score_graph()
+        with metrics.timed("path_finding"):
+            return self._find_all_paths(max_paths, sort, score)
+
+    def _find_all_paths(self, max_paths, sort, score):
         # shortest_simple_paths is slow for >1000 paths
         if max_paths <= 1000:
+            paths = list(self.iter_paths(max_paths, score))
             if score:
-                paths = list(six.moves.map(lambda x: x[1:-1],
-                                           islice(nx.shortest_simple_paths(
-                                                        self.G, self.start, self.end, weight='weight'),
-                                                  max_paths)))
                 scores = self.scorer.score_splits(paths)
                 path_scores = zip(paths, scores)
                 sorted_path_scores = sorted(path_scores, key=operator.itemgetter(1), reverse=True)
@@ -153,12 +156,12 @@ class SandhiGraph(object):
                 sorted_paths, _ = zip(*sorted_path_scores)
                 return list(sorted_paths)
             else:
-                paths = list(six.moves.map(lambda x: x[1:-1],
-                                           islice(nx.shortest_simple_paths(
-                                                        self.G, self.start, self.end),
-                                                  max_paths)))
                 return paths
         else:  # Fall back to all_simple_paths
+            if self.roots:
+                self.lock_start()
+            if score:
+                self.score_graph()
             ps = list(six.moves.map(lambda x: x[1:-1],
                                     nx.all_simple_paths(self.G, self.start, self.end)))
             # If we do not intend to display paths, no need to sort them
@@ -166,6 +169,27 @@ class SandhiGraph(object):
                 ps.sort(key=lambda x: len(x))
             return ps
 
+    def iter_paths(self, max_paths=10, score=True):
+        """ Generate paths through DAG to End, as they are found
+
+            Paths come in order of total edge weight, and are not re-sorted
+            by sentence score as in find_all_paths.
+
+            Params:
+               max_paths (int :default:=10): Number of paths to find
+               score (bool)                : If True (default), weight edges
+                                             with the lexical scorer
+        """
+        if self.roots:
+            self.lock_start()
+        if score:
+            self.score_graph()
+            paths = nx.shortest_simple_paths(self.G, self.start, self.end, weight='weight')
+        else:
+            paths = nx.shortest_simple_paths(self.G, self.start, self.end)
+        for path in islice(paths, max_paths):
+            yield path[1:-1]
+
     def __str__(self):
         """ Print representation of DAG """
         return str(self.G)
@@ -186,10 +210,7 @@ class SandhiGraph(object):
                 labels={x: _uniq(str(x)) for x in self})
 
     def write_dot(self, path):
-        # H = nx.convert_node_labels_to_integers(G, label_attribute=’node_label’)
-        # H_layout = nx.nx_pydot.pydot_layout(G, prog=’dot’)
-        # G_layout = {H.nodes[n][‘node_label’]: p for n, p in H_layout.items()}
-        nx.drawing.nx_pydot.write_dot(self.G, path)
+        dot.write_dot(self.G, path)
 
 
 lakaras = set(['law', 'liw', 'luw', 'lrw', 'low', 'laN', 'liN', 'luN', 'lfN',
@@ -275,6 +296,10 @@ edge_cost['upasargaH'] = 0.65
 edge_cost['vAkyasambanDaH'] = 0.3
 # edge_cost['zazWI-sambanDa'] = 1
 edge_cost_const = ['vAkyasambanDaH', 'samuccitam', 'BAvalakzaRam']
+# Tags and labels that are output over and over
+register_vocabulary(set().union(lakaras, krtverbs, vibhaktis, vacanas, puruzas,
+                                lingas, projlabels, edge_cost, edge_cost_const,
+                                avyaya, kriyavisheshana, [sambodhya]))
 
 class VakyaGraph(object):
     """ DAG class for Sanskrit Vakya Analysis
@@ -314,7 +339,8 @@ class VakyaGraph(object):
             self.partitions.append(set(vnlist))
         logger.debug(f"Node Partitions {self.partitions} Len {len(self.partitions)}")
         self.lock()
-        self.add_edges()
+        with metrics.timed("vakya_edges"):
+            self.add_edges()
         # Remove isolated nodes (with no edges)
         isolates = list(nx.isolates(self.G))
         self.G.remove_nodes_from(isolates)
@@ -323,7 +349,8 @@ class VakyaGraph(object):
             if len(s) == 0:
                 logger.error(f"Partition {ix}: {path[ix]} went to zero length!")
         start_parse = time.time()
-        self.parses = self.get_parses_dc()
+        with metrics.timed("parse_enumeration"):
+            self.parses = self.get_parses_dc()
         end_parse = time.time()
         self.check_parse_validity()
         end_check = time.time()
@@ -931,25 +958,20 @@ class VakyaGraph(object):
                 labels={x: _uniq(str(x)) for x in self})
 
     def write_dot(self, path):
-        nx.drawing.nx_pydot.write_dot(self.G, path)
+        dot.write_dot(self.G, path)
         d = dirname(path)
         be = basename(path)
         b, e = splitext(be)
         logger.debug(f"Path {d} {b} {e}")
         for i, p in enumerate(self.parses):
             pt = join(d, b+f"_parse{i}"+e)
-            nx.drawing.nx_pydot.write_dot(p, pt)
+            dot.write_dot(p, pt)
 
     def get_dot_dict(self):
-        from io import StringIO
-        s = StringIO()
         r = {}
-        nx.drawing.nx_pydot.write_dot(self.G, s)
-        r["split"] = s.getvalue()
+        r["split"] = dot.to_dot(self.G)
         for i, p in enumerate(self.parses):
-            s = StringIO()
-            nx.drawing.nx_pydot.write_dot(p, s)
-            r[i] = s.getvalue()
+            r[i] = dot.to_dot(p)
         return r
 
 
@@ -1206,7 +1228,7 @@ def sambodhya_cost(d, n):
 def jedge(pred, node, label, strict_io=False):
     return (node.pada.canonical(strict_io=strict_io),
             jtag(node.getMorphologicalTags(), strict_io),
-            SanskritImmutableString(label, encoding=sanscript.SLP1).canonical(strict_io=strict_io),
+            transcode(label, sanscript.SLP1, strict_io),
             pred.pada.canonical(strict_io=strict_io))
 
 
@@ -99,13 +99,26 @@ Command line usage
 
 """
 
-import itertools
 import pickle
 import logging
 import datetime
+import threading
+from collections import defaultdict
+from functools import lru_cache
 from zipfile import ZipFile
 from sanskrit_parser.base.sanskrit_base import SanskritNormalizedString, outputctx
 from sanskrit_parser.util.data_manager import data_file_path
+from sanskrit_parser.parser.sandhi_table import load_table
+
+
+# Number of split contexts memoized per Sandhi object
+SPLIT_CACHE_SIZE = 65536
+# Sandhi.table before the rules are first used
+_UNLOADED = object()
+
+
+def _slp1(w):
+    return w if isinstance(w, str) or w is None else w.canonical()
 
 
 class Sandhi(object):
@@ -125,6 +138,25 @@ class Sandhi(object):
         self.forward = None
         self.backward = None
         self.logger = logger or logging.getLogger(__name__)
+        # Compiled rules, loaded with the rules (None to use the pickles)
+        self.table = _UNLOADED
+        self._forward_by_left = None
+        # Rules are loaded on first use, possibly from several threads
+        self._load_lock = threading.Lock()
+        self._split_rules = lru_cache(maxsize=SPLIT_CACHE_SIZE)(self._split_rules)
+
+    def _load_table(self):
+        """ mmap the compiled rules, or return None to fall back to the pickles
+
+            Called with _load_lock held
+        """
+        if self.table is not _UNLOADED:
+            return self.table
+        try:
+            return load_table(data_file_path('sandhi_rules.zip'))
+        except (OSError, ValueError) as e:
+            self.logger.info("Compiled sandhi rules not usable (%s), using sandhi_rules.zip", e)
+            return None
 
     @staticmethod
     def _load_rules_pickle(filename):
@@ -133,18 +165,40 @@ class Sandhi(object):
             with myzip.open(filename) as f:
                 return pickle.load(f)
 
+    # forward and backward are set last, so that a thread that sees them
+    # set also sees the lengths
     def _load_forward(self):
-        if self.forward is None:
-            self.forward = self._load_rules_pickle('sandhi_forward.pkl')
-            keys = self.forward.keys()
-            self.lc_len_max = max(len(k[0]) for k in keys)
-            self.rc_len_max = max(len(k[1]) for k in keys)
+        if self.forward is not None:
+            return
+        with self._load_lock:
+            if self.forward is not None:
+                return
+            self.table = self._load_table()
+            if self.table is not None:
+                forward = self.table.forward
+                self.lc_len_max = self.table.lc_len_max
+                self.rc_len_max = self.table.rc_len_max
+            else:
+                forward = self._load_rules_pickle('sandhi_forward.pkl')
+                keys = forward.keys()
+                self.lc_len_max = max(len(k[0]) for k in keys)
+                self.rc_len_max = max(len(k[1]) for k in keys)
+            self.forward = forward
 
     def _load_backward(self):
-        if self.backward is None:
-            self.backward = self._load_rules_pickle('sandhi_backward.pkl')
-            keys = self.backward.keys()
-            self.after_len_max = max(len(k) for k in keys)
+        if self.backward is not None:
+            return
+        with self._load_lock:
+            if self.backward is not None:
+                return
+            self.table = self._load_table()
+            if self.table is not None:
+                backward = self.table.backward
+                self.after_len_max = self.table.after_len_max
+            else:
+                backward = self._load_rules_pickle('sandhi_backward.pkl')
+                self.after_len_max = max(len(k) for k in backward.keys())
+            self.backward = backward
 
     def join(self, first_in, second_in):
         """
@@ -163,23 +217,108 @@ class Sandhi(object):
             return second
         if second is None:
             return first
-        left_chars = [first[i:] for i in range(max(0, len(first)-self.lc_len_max), len(first))]
-        left_chars.append("^"+first)
-        right_chars = [second[0:i] for i in range(min(self.rc_len_max, len(second))+1)]
-        self.logger.debug("left_chars = %s, right_chars %s", left_chars, right_chars)
-        joins = set()
-        for key in itertools.product(left_chars, right_chars):
-            afters = self.forward.get(key)
-            if afters:
-                for after, annotation in afters:
-                    self.logger.debug("Found sandhi %s = %s (%s)", key, after, annotation)
-                    joins.add(first[:-len(key[0])] + after + second[len(key[1]):])
+        joins = self._join(self._left_rules(first), first, second)
         if len(joins) == 0:
             self.logger.debug("No joins found")
             return None
         else:
             return joins
 
+    def _rights(self, left):
+        """ right -> set of (after, annotation), for forward rules (left, right) """
+        if self.table is not None:
+            return self.table.rights(left)
+        if self._forward_by_left is None:
+            by_left = defaultdict(dict)
+            for (lk, rk), afters in self.forward.items():
+                by_left[lk][rk] = afters
+            self._forward_by_left = by_left
+        return self._forward_by_left.get(left, {})
+
+    def _left_rules(self, first):
+        """
+        Forward rules that match the end of first
+
+        Only the last lc_len_max characters of first matter, so callers
+        can share the result between words with the same ending.
+
+        :return: list of (left context length, right -> set of (after, annotation))
+        """
+        left_chars = [first[i:] for i in range(max(0, len(first)-self.lc_len_max), len(first))]
+        left_chars.append("^"+first)
+        rules = []
+        for left in left_chars:
+            rights = self._rights(left)
+            if rights:
+                rules.append((len(left), rights))
+        return rules
+
+    def _join(self, left_rules, first, second):
+        joins = set()
+        right_chars = [second[0:i] for i in range(min(self.rc_len_max, len(second))+1)]
+        for lc, rights in left_rules:
+            for right in right_chars:
+                afters = rights.get(right)
+                if afters:
+                    for after, annotation in afters:
+                        self.logger.debug("Found sandhi %s = %s (%s)", (first[-lc:], right), after, annotation)
+                        joins.add(first[:-lc] + after + second[len(right):])
+        return joins
+
+    def join_many(self, pairs):
+        """
+        Performs sandhi on many pairs of words.
+
+        Rules matching the end of a first word are looked up once for all
+        pairs whose first words end alike.
+
+        :param pairs: iterable of (first, second), each a SanskritImmutableString or SLP1 str
+        :return: generator of join results, as from join, in the order of pairs
+        """
+        self._load_forward()
+        contexts = {}
+        for first_in, second_in in pairs:
+            first = _slp1(first_in)
+            second = _slp1(second_in)
+            if first is None or len(first) == 0:
+                yield second
+                continue
+            if second is None:
+                yield first
+                continue
+            ctx = first[-self.lc_len_max:]
+            left_rules = contexts.get(ctx)
+            if left_rules is None:
+                left_rules = contexts[ctx] = self._left_rules(ctx)
+            yield self._join(left_rules, first, second) or None
+
+    def join_product(self, firsts, seconds):
+        """
+        Performs sandhi on every pair from the cross product of two word lists.
+
+        :param firsts: iterable of first words, each a SanskritImmutableString or SLP1 str
+        :param seconds: iterable of second words, as for firsts
+        :return: generator of ((first, second), joins), with words in SLP1
+        """
+        self._load_forward()
+        seconds = [_slp1(w) for w in seconds]
+        contexts = {}
+        for first_in in firsts:
+            first = _slp1(first_in)
+            if first is None or len(first) == 0:
+                for second in seconds:
+                    yield (first, second), second
+                continue
+            ctx = first[-self.lc_len_max:]
+            left_rules = contexts.get(ctx)
+            if left_rules is None:
+                left_rules = contexts[ctx] = self._left_rules(ctx)
+            for second in seconds:
+                if second is None:
+                    yield (first, second), first
+                else:
+                    yield (first, second), self._join(left_rules, first, second) or None
+
     def split_at(self, word_in, idx):
         """
         Split sandhi at the given index of word.
@@ -192,33 +331,44 @@ class Sandhi(object):
         self._load_backward()
         word = word_in.canonical()
         self.logger.debug("Split: %s, %d", word, idx)
-        splits = set()
-        # Figure out how may chars we can extract for the afters
-        stop = min(idx+self.after_len_max, len(word))
-        afters = [word[idx:i] for i in range(idx+1, stop+1)]
-        for after in afters:
+        # Only the characters the afters can span, and whether we are at the
+        # start of the word, decide which rules match
+        rules = self._split_rules(word[idx:idx+self.after_len_max], idx == 0)
+        if not rules:
+            self.logger.debug("No split found")
+            return None
+        head = word[:idx]
+        return set((head + left, right + word[idx+n:]) for n, left, right in rules)
+
+    def _split_rules(self, context, at_start):
+        """
+        Backward rules that match at the start of context
+
+        Memoized (see __init__), as the same contexts come up over and over
+        across positions, words and sentences.
+
+        :param context: up to after_len_max characters starting at the split position
+        :param at_start: True if the split position is the start of the word
+        :return: tuple of (after length, left, right), to split as word[:idx] + left, right + word[idx+after length:]
+        """
+        rules = set()
+        for i in range(1, len(context)+1):
+            after = context[:i]
             self.logger.debug("Trying after %s", after)
-            befores = self.backward[after]
+            befores = self.backward.get(after)
             if befores:
                 for before, annotation in befores:
                     self.logger.debug("Found split %s -> %s (%s)", after, before, annotation)
                     # Do we have a beginning-of-line match rule
                     if before[0][0] == "^":
-                        if idx != 0:
+                        if not at_start:
                             # Can't allow matches at any other position
                             continue
                         else:
                             # drop the ^ in the result
                             before = (before[0][1:], before[1])
-                    left = word[:idx] + before[0]
-                    right = before[1] + word[idx+len(after):]
-                    splits.add((left, right))
-
-        if len(splits) == 0:
-            self.logger.debug("No split found")
-            return None
-        else:
-            return splits
+                    rules.add((i, before[0], before[1]))
+        return tuple(rules)
 
     def split_all(self, word_in, start=None, stop=None):
         """
@@ -66,20 +66,33 @@ from __future__ import print_function
 
 from indic_transliteration import sanscript
 from sanskrit_parser.util.lexical_lookup_factory import LexicalLookupFactory
+from sanskrit_parser.util import metrics
 import sanskrit_parser.base.sanskrit_base as SanskritBase
 
 from .sandhi import Sandhi
 import logging
-from .datastructures import SandhiGraph
+import threading
 from argparse import ArgumentParser
+from collections import OrderedDict
 
+logger = logging.getLogger(__name__)
 
-try:
-    from functools import lru_cache
-except ImportError:
-    from backports.functools_lru_cache import lru_cache
 
-logger = logging.getLogger(__name__)
+class _SplitContext(object):
+    """ State of one getSandhiSplits call
+
+        Kept out of the analyzer, so that one analyzer can serve
+        concurrent calls
+    """
+    __slots__ = ('splits', 'dynamic_scoreboard', 'valid_words')
+
+    def __init__(self, splits):
+        # Graph being built
+        self.splits = splits
+        # substring -> roots of its subgraph in splits
+        self.dynamic_scoreboard = {}
+        # word -> lexical validity
+        self.valid_words = {}
 
 
 class LexicalSandhiAnalyzer(object):
@@ -89,14 +102,27 @@ class LexicalSandhiAnalyzer(object):
         and transforming it to a collection (represented by a DAG) of potential sandhi
         splits of the sequence. Each member of a split is guaranteed to be a valid
         lexical form.
+
+        State of a call is kept in a per-call _SplitContext, and the split
+        memo is locked, so an analyzer can be shared between threads.
     """
 
     sandhi = Sandhi()  # Singleton!
 
-    def __init__(self, lexical_lookup="combined"):
+    def __init__(self, lexical_lookup="combined", split_memo_size=0):
+        """
+            Params:
+                lexical_lookup(str): Lexical lookup to use (see LexicalLookupFactory)
+                split_memo_size(int): Number of substrings whose splits are
+                    remembered across inputs (0 to disable)
+        """
         forms = LexicalLookupFactory.create(lexical_lookup)
         self.forms = forms
-        pass
+        # substring -> ((left word, right part), ...) that split it
+        # validly. Unlike dynamic_scoreboard, this survives across inputs
+        self.split_memo_size = split_memo_size
+        self.split_memo = OrderedDict()
+        self._split_memo_lock = threading.Lock()
 
     def getMorphologicalTags(self, obj, tmap=True):
         """ Get Morphological tags for a word
@@ -109,7 +135,8 @@ class LexicalSandhiAnalyzer(object):
                 list: List of (base, tagset) pairs
         """
         ot = obj.canonical()
-        tags = self.forms.get_tags(ot, tmap)
+        with metrics.timed("lexical_lookup"):
+            tags = self.forms.get_tags(ot, tmap)
         return tags
 
     def hasTag(self, obj, name, tagset):
@@ -162,20 +189,21 @@ class LexicalSandhiAnalyzer(object):
             Returns:
               SandhiGraph : DAG all possible splits
         '''
-        self.sentence = SandhiGraph()
+        from .datastructures import SandhiGraph
+        sentence = SandhiGraph()
         prev = None
         for s in sl[::-1]:
-            self.sentence.add_node(s)
+            sentence.add_node(s)
             if prev is None:
-                self.sentence.add_end_edge(s)
+                sentence.add_end_edge(s)
             else:
-                self.sentence.append_to_node(s, [prev])
+                sentence.append_to_node(s, [prev])
             prev = s
-        self.sentence.add_roots([prev])
+        sentence.add_roots([prev])
         if tag:
-            self.tagSandhiGraph(self.sentence)
-        self.sentence.lock_start()
-        return self.sentence
+            self.tagSandhiGraph(sentence)
+        sentence.lock_start()
+        return sentence
 
     def getSandhiSplits(self, o, tag=False, pre_segmented=False):
         ''' Get all valid Sandhi splits for a string
@@ -189,39 +217,51 @@ class LexicalSandhiAnalyzer(object):
         '''
         if pre_segmented:
             return self.preSegmented(o, tag)
-        self.dynamic_scoreboard = {}
+        with metrics.timed("sandhi_splits"):
+            return self._getSandhiSplits(o, tag)
+
+    def _getSandhiSplits(self, o, tag):
+        # Deferred, as it pulls in networkx
+        from .datastructures import SandhiGraph
         # Transform to internal canonical form
         s = o.canonical()
         # Initialize an empty graph to hold the splits
-        self.splits = SandhiGraph()
-        # _possible_splits updates graph in self.splits with nodes and returns roots
-        roots = self._possible_splits(s)
+        ctx = _SplitContext(SandhiGraph())
+        # _possible_splits updates graph in ctx.splits with nodes and returns roots
+        roots = self._possible_splits(s, ctx)
         if tag and len(roots) > 0:
-            self.tagSandhiGraph(self.splits)
+            self.tagSandhiGraph(ctx.splits)
         if len(roots) == 0:
             return None
         else:
-            self.splits.add_roots(roots)
-            return self.splits
+            ctx.splits.add_roots(roots)
+            return ctx.splits
+
+    def _is_valid_word(self, ss, ctx):
+        ''' Lexical validity of ss, memoized for the current input '''
+        if ss in ctx.valid_words:
+            metrics.inc("lexical_lookups_total", result="hit")
+            return ctx.valid_words[ss]
+        metrics.inc("lexical_lookups_total", result="miss")
+        with metrics.timed("lexical_lookup"):
+            r = self.forms.valid(ss)
+        ctx.valid_words[ss] = r
+        return r
 
-    def _possible_splits(self, s):
+    def _possible_splits(self, s, ctx):
         ''' private method to dynamically compute all sandhi splits
 
             Used by getSandhiSplits
-            Adds the individual splits to the graph self.splits and returns
+            Adds the individual splits to the graph ctx.splits and returns
             the roots of the subgraph corresponding to the split of s
            Params:
               s(string): Input SLP1 encoded string
+              ctx(_SplitContext): State of the current call
             Returns:
               roots : set of roots of subgraph corresponding to possible splits of s
         '''
         logger.debug("Splitting " + s)
 
-        @lru_cache(256)
-        def _is_valid_word(ss):
-            r = self.forms.valid(ss)
-            return r
-
         def _sandhi_splits_all(s, start=None, stop=None):
             obj = SanskritBase.SanskritImmutableString(s, encoding=sanscript.SLP1)
             splits = self.sandhi.split_all(obj, start, stop)
@@ -231,9 +271,19 @@ class LexicalSandhiAnalyzer(object):
 
         # Memoization for dynamic programming - remember substrings that've
         # been seen before
-        if s in self.dynamic_scoreboard:
+        if s in ctx.dynamic_scoreboard:
             logger.debug("Found {} in scoreboard".format(s))
-            return self.dynamic_scoreboard[s]
+            return ctx.dynamic_scoreboard[s]
+
+        node_cache = {}
+        pairs = self._split_memo_get(s)
+        if pairs is not None:
+            logger.debug("Found {} in split memo".format(s))
+            # Graft the remembered splits into this graph
+            for (s_c_left, s_c_right) in pairs:
+                self._add_split(s_c_left, s_c_right, roots, node_cache, ctx)
+            ctx.dynamic_scoreboard[s] = roots
+            return roots
 
         # If a space is found in a string, stop at that space
         spos = s.find(" ")
@@ -244,59 +294,87 @@ class LexicalSandhiAnalyzer(object):
         if s_c_list is None:
             s_c_list = []
 
-        node_cache = {}
-
+        pairs = []
         for (s_c_left, s_c_right) in s_c_list:
             # Is the left side a valid word?
-            if _is_valid_word(s_c_left):
+            if self._is_valid_word(s_c_left, ctx):
                 logger.debug("Valid left word: " + s_c_left)
-                # For each split with a valid left part, check it there are
-                # valid splits of the right part
-                if s_c_right and s_c_right != '':
-                    logger.debug("Trying to split:" + s_c_right)
-                    r_roots = self._possible_splits(s_c_right.strip())
-                    # if there are valid splits of the right side
-                    if r_roots:
-                        # Make sure we got a set of roots back
-                        assert isinstance(r_roots, set)
-                        # if there are valid splits of the right side
-                        if s_c_left not in node_cache:
-                            # Extend splits list with s_c_left appended with
-                            # possible splits of s_c_right
-                            t = SanskritBase.SanskritObject(s_c_left, encoding=sanscript.SLP1)
-                            node_cache[s_c_left] = t
-                        else:
-                            t = node_cache[s_c_left]
-                        roots.add(t)
-                        if not self.splits.has_node(t):
-                            self.splits.add_node(t)
-                        self.splits.append_to_node(t, r_roots)
-                else:  # Null right part
-                    # Why cache s_c_left here? To handle the case
-                    # where the same s_c_left appears with a null and non-null
-                    # right side.
-                    if s_c_left not in node_cache:
-                        t = SanskritBase.SanskritObject(s_c_left, encoding=sanscript.SLP1)
-                        node_cache[s_c_left] = t
-                    else:
-                        t = node_cache[s_c_left]
-                    # Extend splits list with s_c_left appended with
-                    # possible splits of s_c_right
-                    roots.add(t)
-                    if not self.splits.has_node(t):
-                        self.splits.add_node(t)
-                    self.splits.add_end_edge(t)
+                if self._add_split(s_c_left, s_c_right, roots, node_cache, ctx):
+                    pairs.append((s_c_left, s_c_right))
             else:
                 logger.debug("Invalid left word: " + s_c_left)
+        self._split_memo_put(s, tuple(pairs))
         # Update scoreboard for this substring, so we don't have to split
         # again
-        self.dynamic_scoreboard[s] = roots
+        ctx.dynamic_scoreboard[s] = roots
         if len(roots) == 0:
             logger.debug("No splits found, returning empty set")
         else:
             logger.debug("Roots: %s", roots)
         return roots
 
+    def _add_split(self, s_c_left, s_c_right, roots, node_cache, ctx):
+        ''' Add the split of a substring into a valid left word s_c_left and
+            s_c_right to the graph, if s_c_right can be split in turn
+
+            Params:
+              s_c_left(str): Valid left word
+              s_c_right(str): Rest of the substring
+              roots(set): roots of the substring's subgraph, updated
+              node_cache(dict): nodes for left words of the substring
+              ctx(_SplitContext): State of the current call
+            Returns:
+              bool: True if the split was added
+        '''
+        # For each split with a valid left part, check it there are
+        # valid splits of the right part
+        if s_c_right and s_c_right != '':
+            logger.debug("Trying to split:" + s_c_right)
+            r_roots = self._possible_splits(s_c_right.strip(), ctx)
+            # if there are valid splits of the right side
+            if not r_roots:
+                return False
+            # Make sure we got a set of roots back
+            assert isinstance(r_roots, set)
+        else:
+            r_roots = None
+        # Why cache s_c_left here? To handle the case
+        # where the same s_c_left appears with a null and non-null
+        # right side.
+        if s_c_left not in node_cache:
+            t = SanskritBase.SanskritObject(s_c_left, encoding=sanscript.SLP1)
+            node_cache[s_c_left] = t
+        else:
+            t = node_cache[s_c_left]
+        # Extend splits list with s_c_left appended with
+        # possible splits of s_c_right
+        roots.add(t)
+        if not ctx.splits.has_node(t):
+            ctx.splits.add_node(t)
+        if r_roots is None:  # Null right part
+            ctx.splits.add_end_edge(t)
+        else:
+            ctx.splits.append_to_node(t, r_roots)
+        return True
+
+    def _split_memo_get(self, s):
+        if self.split_memo_size <= 0:
+            return None
+        with self._split_memo_lock:
+            pairs = self.split_memo.get(s)
+            if pairs is not None:
+                self.split_memo.move_to_end(s)
+        metrics.inc("split_memo_total", result="miss" if pairs is None else "hit")
+        return pairs
+
+    def _split_memo_put(self, s, pairs):
+        if self.split_memo_size <= 0:
+            return
+        with self._split_memo_lock:
+            self.split_memo[s] = pairs
+            while len(self.split_memo) > self.split_memo_size:
+                self.split_memo.popitem(last=False)
+
 
 def getArgs(argv=None):
     """
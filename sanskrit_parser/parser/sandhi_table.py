@@ -0,0 +1,311 @@
+# -*- coding: utf-8 -*-
+"""
+Compiled sandhi rule tables
+
+The expanded sandhi rules are large dicts of sets of tuples, which take a
+while to unpickle, and a lot of memory once loaded. This module stores
+them in a versioned binary file that is mmap'ed: loading it is a header
+read, and processes loading the same file share its pages.
+
+Tables are built from sandhi_rules.zip on first use, into CACHE_DIR (see
+util.data_manager), in a file named by the hash of the zip. The header
+holds the hash too, so a table is only used with the rules it was built
+from: regenerating sandhi_rules.zip rebuilds the table.
+
+File layout (little endian, sections 8 byte aligned):
+
+    header        : magic, version, counts, maximum key lengths and the
+                    sha256 of the source rules
+    str_offsets   : u32[n_strings + 1], offsets of strings into pool
+    pool          : sorted, distinct strings, utf-8, concatenated
+    fwd_keys      : u64[n_fwd_keys], sorted (left_id << 32 | right_id)
+    fwd_index     : u32[n_fwd_keys + 1], ranges of fwd_vals for each key
+    fwd_vals      : u32[n_fwd_vals][2], (after_id, annotation_id)
+    bwd_keys      : u32[n_bwd_keys], sorted after_id
+    bwd_index     : u32[n_bwd_keys + 1], ranges of bwd_vals for each key
+    bwd_vals      : u32[n_bwd_vals][3], (left_id, right_id, annotation_id)
+
+As the string pool is sorted, string ids sort like the strings, so keys
+are looked up by binary search on the id arrays.
+
+Command line usage
+==================
+
+Build the table for sandhi_rules.zip, eg: in a docker image::
+
+    $ python -m sanskrit_parser.parser.sandhi_table
+
+"""
+
+import bisect
+import hashlib
+import logging
+import mmap
+import os
+import pickle
+import struct
+import sys
+from functools import lru_cache
+from zipfile import ZipFile
+
+from sanskrit_parser.util.data_manager import CACHE_DIR
+
+MAGIC = b'SPSANDHI'
+VERSION = 2
+# magic, version, n_strings, pool_bytes, n_fwd_keys, n_fwd_vals,
+# n_bwd_keys, n_bwd_vals, lc_len_max, rc_len_max, after_len_max, source
+_header = struct.Struct('<8s10I32s')
+# Lookups memoized per table
+CACHE_SIZE = 65536
+
+logger = logging.getLogger(__name__)
+
+
+def _pad(n):
+    return -n % 8
+
+
+def source_hash(path):
+    """ sha256 digest of the source rules file path """
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).digest()
+
+
+def table_file(source, cache_dir=None):
+    """ Table file for source rules with sha256 digest source """
+    return os.path.join(cache_dir or CACHE_DIR, f'sandhi_rules-{source.hex()[:16]}.bin')
+
+
+def write_table(path, forward, backward, source=bytes(32)):
+    """ Write the compiled form of sandhi rules
+
+        The table replaces path once complete
+        Params:
+            path(str): Output file
+            forward(dict): (left, right) -> set of (after, annotation)
+            backward(dict): after -> set of ((left, right), annotation)
+            source(bytes): sha256 digest of the rules the table is built from
+    """
+    strings = set()
+    for (left, right), v in forward.items():
+        strings.update((left, right))
+        for after, ann in v:
+            strings.update((after, ann))
+    for after, v in backward.items():
+        strings.add(after)
+        for (left, right), ann in v:
+            strings.update((left, right, ann))
+    strings = sorted(strings)
+    ids = {s: i for i, s in enumerate(strings)}
+
+    str_offsets = [0]
+    pool = bytearray()
+    for s in strings:
+        pool += s.encode('utf-8')
+        str_offsets.append(len(pool))
+
+    fwd_keys = sorted(forward)
+    fwd_index = [0]
+    fwd_vals = []
+    for k in fwd_keys:
+        for after, ann in sorted(forward[k]):
+            fwd_vals += [ids[after], ids[ann]]
+        fwd_index.append(len(fwd_vals) // 2)
+    bwd_keys = sorted(k for k in backward if backward[k])
+    bwd_index = [0]
+    bwd_vals = []
+    for k in bwd_keys:
+        for (left, right), ann in sorted(backward[k]):
+            bwd_vals += [ids[left], ids[right], ids[ann]]
+        bwd_index.append(len(bwd_vals) // 3)
+
+    header = _header.pack(MAGIC, VERSION, len(strings), len(pool),
+                          len(fwd_keys), len(fwd_vals) // 2,
+                          len(bwd_keys), len(bwd_vals) // 3,
+                          max(len(k[0]) for k in fwd_keys),
+                          max(len(k[1]) for k in fwd_keys),
+                          max(len(k) for k in bwd_keys), source)
+    sections = [
+        struct.pack(f'<{len(str_offsets)}I', *str_offsets),
+        bytes(pool),
+        struct.pack(f'<{len(fwd_keys)}Q', *[ids[left] << 32 | ids[right] for left, right in fwd_keys]),
+        struct.pack(f'<{len(fwd_index)}I', *fwd_index),
+        struct.pack(f'<{len(fwd_vals)}I', *fwd_vals),
+        struct.pack(f'<{len(bwd_keys)}I', *[ids[k] for k in bwd_keys]),
+        struct.pack(f'<{len(bwd_index)}I', *bwd_index),
+        struct.pack(f'<{len(bwd_vals)}I', *bwd_vals),
+    ]
+    # Write and rename, so concurrent loaders never see a partial file
+    tmp = f'{path}.{os.getpid()}'
+    try:
+        with open(tmp, 'wb') as f:
+            f.write(header)
+            f.write(b'\0' * _pad(_header.size))
+            for s in sections:
+                f.write(s)
+                f.write(b'\0' * _pad(len(s)))
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def load_table(zip_path, cache_dir=None):
+    """ SandhiTable of the rules in zip_path, built into cache_dir if needed
+
+        Params:
+            zip_path(str): Pickled rules, as written by data/create_sandhi_rules.py
+            cache_dir(str): Cache directory (def=CACHE_DIR)
+        Raises:
+            OSError: If the table cannot be built
+            ValueError: As for SandhiTable
+    """
+    source = source_hash(zip_path)
+    path = table_file(source, cache_dir)
+    try:
+        return SandhiTable(path, source)
+    except (OSError, ValueError) as e:
+        logger.info("Building compiled sandhi rules in %s (%s)", path, e)
+    # Check before unpickling the rules, which callers fall back to
+    d = os.path.dirname(path)
+    os.makedirs(d, exist_ok=True)
+    if not os.access(d, os.W_OK):
+        raise PermissionError(f"Cannot write compiled sandhi rules to {d}")
+    with ZipFile(zip_path) as myzip:
+        with myzip.open('sandhi_forward.pkl') as f:
+            forward = pickle.load(f)
+        with myzip.open('sandhi_backward.pkl') as f:
+            backward = pickle.load(f)
+    write_table(path, forward, backward, source)
+    return SandhiTable(path, source)
+
+
+class SandhiTable(object):
+    """ Read only view of a compiled sandhi rule file
+
+        Attributes:
+            forward: (left, right) -> frozenset of (after, annotation), with a dict-like get
+            rights(left): dict of right -> frozenset of (after, annotation) for forward keys with left
+            backward: after -> frozenset of ((left, right), annotation), with a dict-like get
+            lc_len_max(int), rc_len_max(int): Longest left and right contexts in forward
+            after_len_max(int): Longest key in backward
+        Params:
+            path(str): Compiled rule file, as written by write_table
+            source(bytes): sha256 digest of the rules the file must be built from (def: any)
+        Raises:
+            ValueError: If path is not a compiled rule file of this version,
+                        is built from other rules, or this platform is not
+                        little endian
+    """
+
+    def __init__(self, path, source=None):
+        if sys.byteorder != 'little':
+            raise ValueError("Compiled sandhi rules need a little endian platform")
+        with open(path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._mm) < _header.size:
+            raise ValueError(f"{path} is not a compiled sandhi rule file")
+        (magic, version, n_strings, pool_bytes, n_fwd_keys, n_fwd_vals,
+         n_bwd_keys, n_bwd_vals, self.lc_len_max, self.rc_len_max,
+         self.after_len_max, self.source) = _header.unpack_from(self._mm)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} compiled sandhi rule file")
+        if source is not None and source != self.source:
+            raise ValueError(f"{path} is not built from the current sandhi rules")
+        view = memoryview(self._mm)
+        pos = _header.size + _pad(_header.size)
+
+        def section(size, fmt=None):
+            nonlocal pos
+            s = view[pos:pos + size]
+            pos += size + _pad(size)
+            return s if fmt is None else s.cast(fmt)
+
+        self._str_offsets = section(4 * (n_strings + 1), 'I')
+        self._pool = section(pool_bytes)
+        self._fwd_keys = section(8 * n_fwd_keys, 'Q')
+        self._fwd_index = section(4 * (n_fwd_keys + 1), 'I')
+        self._fwd_vals = section(8 * n_fwd_vals, 'I')
+        self._bwd_keys = section(4 * n_bwd_keys, 'I')
+        self._bwd_index = section(4 * (n_bwd_keys + 1), 'I')
+        self._bwd_vals = section(12 * n_bwd_vals, 'I')
+        self._n_strings = n_strings
+        self.forward = _Lookup(lru_cache(maxsize=CACHE_SIZE)(self._get_forward))
+        self.backward = _Lookup(lru_cache(maxsize=CACHE_SIZE)(self._get_backward))
+        self.rights = lru_cache(maxsize=CACHE_SIZE)(self._get_rights)
+
+    def _string(self, i):
+        return str(self._pool[self._str_offsets[i]:self._str_offsets[i + 1]], 'utf-8')
+
+    def _id(self, s):
+        ''' Id of string s, or None if it is not in the pool '''
+        b = s.encode('utf-8')
+        lo, hi = 0, self._n_strings
+        offsets = self._str_offsets
+        pool = self._pool
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if pool[offsets[mid]:offsets[mid + 1]].tobytes() < b:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self._n_strings and pool[offsets[lo]:offsets[lo + 1]] == b:
+            return lo
+        return None
+
+    def _get_forward(self, key):
+        left = self._id(key[0])
+        right = self._id(key[1])
+        if left is None or right is None:
+            return None
+        k = left << 32 | right
+        ix = bisect.bisect_left(self._fwd_keys, k)
+        if ix == len(self._fwd_keys) or self._fwd_keys[ix] != k:
+            return None
+        v = self._fwd_vals
+        return frozenset((self._string(v[2 * i]), self._string(v[2 * i + 1]))
+                         for i in range(self._fwd_index[ix], self._fwd_index[ix + 1]))
+
+    def _get_rights(self, left):
+        """ right -> frozenset of (after, annotation), for forward keys (left, right) """
+        i = self._id(left)
+        if i is None:
+            return {}
+        start = bisect.bisect_left(self._fwd_keys, i << 32)
+        stop = bisect.bisect_left(self._fwd_keys, (i + 1) << 32, start)
+        v = self._fwd_vals
+        return {self._string(self._fwd_keys[ix] & 0xffffffff):
+                frozenset((self._string(v[2 * j]), self._string(v[2 * j + 1]))
+                          for j in range(self._fwd_index[ix], self._fwd_index[ix + 1]))
+                for ix in range(start, stop)}
+
+    def _get_backward(self, after):
+        a = self._id(after)
+        if a is None:
+            return None
+        ix = bisect.bisect_left(self._bwd_keys, a)
+        if ix == len(self._bwd_keys) or self._bwd_keys[ix] != a:
+            return None
+        v = self._bwd_vals
+        return frozenset(((self._string(v[3 * i]), self._string(v[3 * i + 1])), self._string(v[3 * i + 2]))
+                         for i in range(self._bwd_index[ix], self._bwd_index[ix + 1]))
+
+
+class _Lookup(object):
+    ''' dict-like get over a lookup function '''
+
+    def __init__(self, f):
+        self._f = f
+
+    def get(self, key, default=None):
+        v = self._f(key)
+        return default if v is None else v
+
+
+if __name__ == "__main__":
+    from sanskrit_parser.util.data_manager import data_file_path
+
+    zip_path = data_file_path('sandhi_rules.zip')
+    load_table(zip_path)
+    print(f'Compiled sandhi rules in {table_file(source_hash(zip_path))}')
@@ -1,4 +1,9 @@
-from flask import Blueprint
+import contextvars
+import functools
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from flask import Blueprint, Response, g, stream_with_context
 import flask_restx
 from flask_restx import Resource
 from flask import request
@@ -10,6 +15,8 @@ from sanskrit_parser.base.sanskrit_base import SanskritObject
 from sanskrit_parser.parser.sandhi_analyzer import LexicalSandhiAnalyzer
 from sanskrit_parser import __version__
 from sanskrit_parser import Parser
+from sanskrit_parser.rest_api.response_cache import ResponseCache, cache_key, etag
+from sanskrit_parser.util import metrics
 
 URL_PREFIX = '/v1'
 api_blueprint = Blueprint(
@@ -23,7 +30,65 @@ api = flask_restx.Api(app=api_blueprint, version='1.0', title='sanskrit_parser A
                       default_label=api_blueprint.name,
                       prefix=URL_PREFIX, doc='/docs')
 
-analyzer = LexicalSandhiAnalyzer()
+# Set SANSKRIT_PARSER_SPLIT_MEMO_SIZE to remember splits of this many
+# substrings across requests
+SPLIT_MEMO_SIZE = int(os.environ.get("SANSKRIT_PARSER_SPLIT_MEMO_SIZE", 0))
+analyzer = LexicalSandhiAnalyzer(split_memo_size=SPLIT_MEMO_SIZE)
+# Upper bound on the worker threads a batch request may ask for
+MAX_BATCH_WORKERS = 4
+_batch_executor = None
+# Responses of the lookup endpoints. Set SANSKRIT_PARSER_CACHE_DB to an sqlite
+# file to share cached responses between server processes. Both the memory
+# and the file hold up to SANSKRIT_PARSER_CACHE_SIZE responses
+response_cache = ResponseCache(maxsize=int(os.environ.get("SANSKRIT_PARSER_CACHE_SIZE", 4096)),
+                               db_file=os.environ.get("SANSKRIT_PARSER_CACHE_DB"))
+# Cached responses may be stored by clients and proxies for this long
+CACHE_MAX_AGE = 86400
+
+
+@api_blueprint.before_request
+def _set_metrics_labels():
+    endpoint = request.endpoint.split(".")[-1] if request.endpoint else "unknown"
+    g.metrics_token = metrics.set_labels(endpoint=endpoint)
+
+
+@api_blueprint.after_request
+def _count_request(response):
+    metrics.inc("requests_total", status=response.status_code)
+    return response
+
+
+@api_blueprint.teardown_request
+def _reset_metrics_labels(exc):
+    token = g.pop("metrics_token", None)
+    if token is not None:
+        metrics.reset_labels(token)
+
+
+def _input_labels(f):
+    """ Label metrics recorded by f with the length of its input """
+    @functools.wraps(f)
+    def _f(v, *args, **kwargs):
+        with metrics.labels(input_length=len(v)):
+            return f(v, *args, **kwargs)
+    return _f
+
+
+def _make_parser(sandhi_analyzer=None):
+    """ Parser configured for the presegmented endpoints """
+    # We set strict_io to False so we get output with visargas
+    # If further processing is desired, this needs to be set to True
+    # And the UI must handle display
+    p = Parser(input_encoding=sanscript.SLP1,
+               output_encoding=sanscript.DEVANAGARI,
+               strict_io=False,
+               replace_ending_visarga='s',
+               sandhi_analyzer=sandhi_analyzer)
+    return p
+
+
+# Both are shared by request threads and batch worker threads
+parser = _make_parser(analyzer)
 
 
 def jedge(pred, node, label):
@@ -57,66 +122,273 @@ class Version(Resource):
         return r
 
 
+def _strict_p():
+    """ strict_io setting requested through the query string """
+    return request.args.get("strict") != "false"
+
+
+def _cached(key, p, f):
+    """ Response for input p, from the cache if possible
+
+        f computes the response (minus the echoed input) on a miss
+    """
+    r = {"input": p}
+    cr = response_cache.get(key)
+    if cr is None:
+        cr = f()
+        response_cache.put(key, cr)
+    r.update(cr)
+    return r
+
+
+def _tags_key(p):
+    return cache_key("tags", SanskritObject(p, strict_io=False).canonical())
+
+
+@_input_labels
+def _tags(p):
+    pobj = SanskritObject(p, strict_io=False)
+
+    def _compute():
+        tags = analyzer.getMorphologicalTags(pobj)
+        with metrics.timed("serialization"):
+            if tags is not None:
+                ptags = jtags(tags)
+            else:
+                ptags = []
+        return {"devanagari": pobj.devanagari(), "tags": ptags}
+    return _cached(cache_key("tags", pobj.canonical()), p, _compute)
+
+
+def _splits_key(v, strict_p=True):
+    vobj = SanskritObject(v, strict_io=strict_p, replace_ending_visarga=None)
+    return cache_key("splits", vobj.canonical(), strict_p)
+
+
+@_input_labels
+def _splits(v, strict_p=True):
+    vobj = SanskritObject(v, strict_io=strict_p, replace_ending_visarga=None)
+
+    def _compute():
+        sg = analyzer.getSandhiSplits(vobj)
+        if sg:
+            splits = sg.find_all_paths(10)
+            # We don't get output with visargas here.
+            # Why? Because this will need to be parsed later, and we need to distinguish s/r
+            # We rely on the UI to handle display correctly
+            with metrics.timed("serialization"):
+                jsplits = [[ss.devanagari(strict_io=True) for ss in s] for s in splits]
+        else:
+            jsplits = []
+        return {"devanagari": vobj.devanagari(), "splits": jsplits}
+    return _cached(cache_key("splits", vobj.canonical(), strict_p), v, _compute)
+
+
+def _http_cached(key, f):
+    """ Respond with HTTP caching headers for cache key
+
+        Returns 304 without computing f() if the client already has it
+    """
+    tag = etag(key)
+    headers = {"ETag": f'"{tag}"',
+               "Cache-Control": f"public, max-age={CACHE_MAX_AGE}"}
+    if tag in request.if_none_match:
+        return None, 304, headers
+    return f(), 200, headers
+
+
+@_input_labels
+def _parse_presegmented(v, strict_p=True, with_dot=False):
+    vobj = SanskritObject(v, strict_io=strict_p, replace_ending_visarga=None)
+    r = {"input": v, "devanagari": vobj.devanagari(), "analysis": []}
+    for split in parser.split(vobj.canonical(), limit=10, pre_segmented=True):
+        parses = split.parse(limit=10)
+        r["analysis"] = [x.serializable() for x in parses]
+        if with_dot:
+            r["split_dot"] = split.to_dot()
+            r["parse_dots"] = [x.to_dot() for x in parses]
+    return r
+
+
+def _splits_stream(v, strict_p=True):
+    """ Generate the splits of v as they are found """
+    vobj = SanskritObject(v, strict_io=strict_p, replace_ending_visarga=None)
+    yield {"input": v, "devanagari": vobj.devanagari()}
+    with metrics.labels(input_length=len(v)):
+        sg = analyzer.getSandhiSplits(vobj)
+    if sg:
+        for s in sg.iter_paths(10):
+            yield {"split": [ss.devanagari(strict_io=True) for ss in s]}
+
+
+def _parse_presegmented_stream(v, strict_p=True, with_dot=False):
+    """ Generate the header, then each parse of v as it is translated
+
+        The parses of a split are all computed before its first record
+        (see Split.iter_parses), so only their serialization is streamed
+    """
+    vobj = SanskritObject(v, strict_io=strict_p, replace_ending_visarga=None)
+    yield {"input": v, "devanagari": vobj.devanagari()}
+    with metrics.labels(input_length=len(v)):
+        splits = parser.split(vobj.canonical(), limit=10, pre_segmented=True)
+    for split in splits:
+        for i, x in enumerate(split.iter_parses(limit=10)):
+            if with_dot and i == 0:
+                # The first parse builds the VakyaGraph behind the split dot
+                yield {"split_dot": split.to_dot()}
+            r = {"analysis": x.serializable()}
+            if with_dot:
+                r["parse_dot"] = x.to_dot()
+            yield r
+
+
+def _with_dot():
+    """ Was graph (DOT) output requested through the query string """
+    return request.args.get("dot") == "true"
+
+
+def _stream_format():
+    """ Streaming format requested through the query string, or None """
+    stream = request.args.get("stream")
+    if stream in ("true", "ndjson"):
+        return "ndjson"
+    if stream == "sse":
+        return "sse"
+    return None
+
+
+def _in_context(records):
+    """ Generate records in a copy of the current context
+
+        Streamed records are generated after the request hooks have run, so
+        metrics recorded while generating them keep the request labels
+    """
+    ctx = contextvars.copy_context()
+    it = iter(records)
+
+    def _records():
+        while True:
+            try:
+                r = ctx.run(next, it)
+            except StopIteration:
+                return
+            yield r
+    return _records()
+
+
+def _stream_response(records):
+    """ Stream records as they are generated
+
+        As NDJSON (one JSON document per line), or as Server-Sent Events
+        with one data event per record
+    """
+    records = _in_context(records)
+    if _stream_format() == "sse":
+        def _sse():
+            for r in records:
+                yield "data: " + json.dumps(r, ensure_ascii=False) + "\n\n"
+        return Response(stream_with_context(_sse()), mimetype="text/event-stream")
+
+    def _ndjson():
+        for r in records:
+            yield json.dumps(r, ensure_ascii=False) + "\n"
+    return Response(stream_with_context(_ndjson()), mimetype="application/x-ndjson")
+
+
+def _batch_items():
+    """ Items of a batch request: a JSON array of strings """
+    items = request.get_json(force=True, silent=True)
+    if not isinstance(items, list) or not all(isinstance(x, str) for x in items):
+        api.abort(400, "Expected a JSON array of strings")
+    return items
+
+
+def _batch_map(f, items, workers):
+    """ Apply f to items, fanning out over worker threads if asked
+
+        Results are returned in input order
+    """
+    global _batch_executor
+    if workers <= 1 or len(items) <= 1:
+        return map(f, items)
+    if _batch_executor is None:
+        _batch_executor = ThreadPoolExecutor(max_workers=MAX_BATCH_WORKERS)
+    # Run each item in a copy of our context, so metrics keep their labels
+    futures = [_batch_executor.submit(contextvars.copy_context().run, f, x) for x in items]
+    return (fu.result() for fu in futures)
+
+
+def _batch_response(f, items):
+    """ Run a batch, returning a JSON array or NDJSON stream of results
+
+        Query Params:
+           workers(int): Number of worker threads (def=1, max=MAX_BATCH_WORKERS)
+           stream(str):  "true"/"ndjson" or "sse" to stream results (see _stream_response)
+    """
+    workers = min(request.args.get("workers", default=1, type=int), MAX_BATCH_WORKERS)
+    results = _batch_map(f, items, workers)
+    if _stream_format() is not None:
+        return _stream_response(results)
+    return list(results)
+
+
 @api.route('/tags/<string:p>')
 class Tags(Resource):
     def get(self, p):
         """ Get lexical tags for p """
-        pobj = SanskritObject(p, strict_io=False)
-        tags = analyzer.getMorphologicalTags(pobj)
-        if tags is not None:
-            ptags = jtags(tags)
-        else:
-            ptags = []
-        r = {"input": p, "devanagari": pobj.devanagari(), "tags": ptags}
-        return r
+        return _http_cached(_tags_key(p), lambda: _tags(p))
 
 
 @api.route('/splits/<string:v>')
 class Splits(Resource):
     def get(self, v):
-        """ Get lexical tags for v """
-        strict_p = True
-        if request.args.get("strict") == "false":
-            strict_p = False
-        vobj = SanskritObject(v, strict_io=strict_p, replace_ending_visarga=None)
-        g = analyzer.getSandhiSplits(vobj)
-        if g:
-            splits = g.find_all_paths(10)
-            # We don't get output with visargas here.
-            # Why? Because this will need to be parsed later, and we need to distinguish s/r
-            # We rely on the UI to handle display correctly
-            jsplits = [[ss.devanagari(strict_io=True) for ss in s] for s in splits]
-        else:
-            jsplits = []
-        r = {"input": v, "devanagari": vobj.devanagari(), "splits": jsplits}
-        return r
+        """ Get lexical tags for v
+
+            ?stream=ndjson or ?stream=sse streams the splits as they are found
+        """
+        strict_p = _strict_p()
+        if _stream_format() is not None:
+            return _stream_response(_splits_stream(v, strict_p))
+        return _http_cached(_splits_key(v, strict_p), lambda: _splits(v, strict_p))
 
 
 @api.route('/parse-presegmented/<string:v>')
 class Parse_Presegmented(Resource):
     def get(self, v):
-        """ Parse a presegmented sentence """
-        strict_p = True
-        if request.args.get("strict") == "false":
-            strict_p = False
-        vobj = SanskritObject(v, strict_io=strict_p, replace_ending_visarga=None)
-        # We set strict_io to False so we get output with visargas
-        # If further processing is desired, this needs to be set to True
-        # And the UI must handle display
-        parser = Parser(input_encoding=sanscript.SLP1,
-                        output_encoding=sanscript.DEVANAGARI,
-                        strict_io=False,
-                        replace_ending_visarga='s')
-        mres = []
-        for split in parser.split(vobj.canonical(), limit=10, pre_segmented=True):
-            parses = list(split.parse(limit=10))
-            sdot = split.to_dot()
-            mres = [x.serializable() for x in parses]
-            pdots = [x.to_dot() for x in parses]
-        r = {"input": v, "devanagari": vobj.devanagari(), "analysis": mres,
-             "split_dot": sdot,
-             "parse_dots": pdots}
-        return r
+        """ Parse a presegmented sentence
+
+            ?dot=true adds DOT graphs of the split and of each parse
+            ?stream=ndjson or ?stream=sse streams each parse as it is translated.
+            The parses of each split are computed up front, so the first parse
+            of a split comes once all of its parses are found
+        """
+        if _stream_format() is not None:
+            return _stream_response(_parse_presegmented_stream(v, _strict_p(), _with_dot()))
+        return _parse_presegmented(v, _strict_p(), _with_dot())
+
+
+@api.route('/batch/tags')
+class BatchTags(Resource):
+    def post(self):
+        """ Get lexical tags for a JSON array of words """
+        return _batch_response(_tags, _batch_items())
+
+
+@api.route('/batch/splits')
+class BatchSplits(Resource):
+    def post(self):
+        """ Get splits for a JSON array of strings """
+        strict_p = _strict_p()
+        return _batch_response(lambda v: _splits(v, strict_p), _batch_items())
+
+
+@api.route('/batch/parse-presegmented')
+class BatchParsePresegmented(Resource):
+    def post(self):
+        """ Parse a JSON array of presegmented sentences """
+        strict_p = _strict_p()
+        with_dot = _with_dot()
+        return _batch_response(lambda v: _parse_presegmented(v, strict_p, with_dot), _batch_items())
 
 
 @api.route('/presegmented/<string:v>')
@@ -124,9 +396,6 @@ class Presegmented(Resource):
     def get(self, v):
         """ Presegmented Split """
         vobj = SanskritObject(v, strict_io=True, replace_ending_visarga=None)
-        parser = Parser(input_encoding=sanscript.SLP1,
-                        output_encoding=sanscript.DEVANAGARI,
-                        replace_ending_visarga='s')
         splits = parser.split(vobj.canonical(), limit=10, pre_segmented=True)
         r = {"input": v, "devanagari": vobj.devanagari(), "splits": [x.serializable()['split'] for x in splits]}
         return r
@@ -7,6 +7,8 @@ import jsonpickle
 # from flask import url_for
 from flask_cors import CORS
 
+from sanskrit_parser.util import metrics
+
 
 """ The flask app we serve in run.py.
 """
@@ -33,6 +35,12 @@ def index():
     return flask.redirect('sanskrit_parser/docs')
 
 
+@app.route('/metrics')
+def metrics_text():
+    """ Metrics in the Prometheus text exposition format """
+    return flask.Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+
 # Cant use flask-sitemap - won't list flask restplus routes.
 @app.route("/sitemap")
 def site_map():
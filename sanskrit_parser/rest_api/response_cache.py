@@ -0,0 +1,107 @@
+"""
+Cache for REST API responses
+
+Results of the lookup endpoints are pure functions of the canonical (SLP1)
+input and the query flags, so they are cached here: in an in-process LRU of
+bounded size, and optionally in an sqlite file that can be shared between
+worker processes. The sqlite file holds as many responses as the LRU, and
+drops the oldest inserted first.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+
+from sanskrit_parser import __version__
+
+
+def cache_key(endpoint, canonical, *flags):
+    ''' Cache key for an endpoint, SLP1 input and query flags
+
+        The library version is part of the key, so an upgrade
+        invalidates old entries
+    '''
+    return "\t".join([__version__, endpoint, canonical] + [str(f) for f in flags])
+
+
+def etag(key):
+    ''' HTTP entity tag for a cache key '''
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+
+class ResponseCache(object):
+    """ LRU cache of JSON serializable responses
+
+        Params:
+            maxsize(int): Number of responses to hold, in memory and in db_file
+            db_file(str): Optional sqlite file backing the cache
+    """
+
+    def __init__(self, maxsize=1024, db_file=None):
+        self.maxsize = maxsize
+        self.db_file = db_file
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        # sqlite connections can't be shared between threads
+        self._local = threading.local()
+        if self.db_file is not None:
+            with self._conn() as conn:
+                conn.execute('CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, value TEXT)')
+
+    def _conn(self):
+        ''' Connection to db_file of this thread '''
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(self.db_file)
+        return conn
+
+    def get(self, key):
+        ''' Cached response for key, or None '''
+        with self._lock:
+            if key in self._lru:
+                self._lru.move_to_end(key)
+                self.hits += 1
+                return self._lru[key]
+        value = None
+        if self.db_file is not None:
+            res = self._conn().execute('SELECT value FROM responses WHERE key=?', (key,)).fetchone()
+            if res is not None:
+                value = json.loads(res[0])
+                self._put_lru(key, value)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def put(self, key, value):
+        ''' Cache response value for key '''
+        self._put_lru(key, value)
+        if self.db_file is not None:
+            # A replaced row gets a new rowid, so rowids are in insertion order
+            with self._conn() as conn:
+                conn.execute('INSERT OR REPLACE INTO responses VALUES (?, ?)',
+                             (key, json.dumps(value, ensure_ascii=False)))
+                conn.execute('DELETE FROM responses WHERE rowid IN '
+                             '(SELECT rowid FROM responses ORDER BY rowid DESC LIMIT -1 OFFSET ?)',
+                             (self.maxsize,))
+
+    def _put_lru(self, key, value):
+        with self._lock:
+            self._lru[key] = value
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.maxsize:
+                self._lru.popitem(last=False)
+
+    def clear(self):
+        ''' Drop in-memory entries '''
+        with self._lock:
+            self._lru.clear()
+
+    def __len__(self):
+        return len(self._lru)
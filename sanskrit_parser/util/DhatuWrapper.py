@@ -21,15 +21,21 @@ class DhatuWrapper(object):
 
     def __init__(self, logger=None):
         self.logger = logger or logging.getLogger(__name__)
-        db_path = data_file_path(self.db_file)
-        self.db = TinyDB(db_path, access_mode='r')
-        assert len(self.db.all()) != 0
+        self.db = None
+
+    def _load(self):
+        """ Load the database on first use """
+        if self.db is None:
+            db_path = data_file_path(self.db_file)
+            self.db = TinyDB(db_path, access_mode='r')
+            assert len(self.db.all()) != 0
 
     def _get_dhatus(self, d):
         """ Get all tags for a dhatu d """
         if d is None:
             return None
         else:
+            self._load()
             return self.db.search(self.q.DAtuH == d)
 
     def is_sakarmaka(self, d):
@@ -6,8 +6,14 @@ Utils to manage the data files included in the package
 
 import importlib_resources
 import atexit
+import os
 from contextlib import ExitStack
 
+# Files derived from the package data (eg: compiled or parsed forms) are
+# cached here. Set SANSKRIT_PARSER_CACHE_DIR to move the cache
+CACHE_DIR = os.environ.get("SANSKRIT_PARSER_CACHE_DIR",
+                           os.path.join(os.path.expanduser("~"), ".cache", "sanskrit_parser"))
+
 
 def data_file_path(filename):
     file_manager = ExitStack()
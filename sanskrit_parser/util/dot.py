@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+'''
+Graphviz DOT serialization of networkx graphs
+
+A lightweight replacement for networkx.drawing.nx_pydot.write_dot, which
+round-trips every graph through pydot. Output follows the same layout:
+quoted node names from str(node), and edge attributes (plus the key for
+multigraphs) in brackets.
+'''
+
+
+def _quote(s):
+    ''' Quote a DOT identifier, escaping backslashes, quotes and newlines '''
+    s = str(s).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return '"' + s + '"'
+
+
+def _attrs(d):
+    ''' DOT attribute list for a dict, or "" if empty '''
+    if not d:
+        return ""
+    return " [" + ", ".join(f"{k}={_quote(v)}" for k, v in d.items()) + "]"
+
+
+def to_dot(G):
+    ''' Return the DOT representation of graph G as a string '''
+    lines = []
+    graph_type = "digraph" if G.is_directed() else "graph"
+    if not G.is_multigraph():
+        graph_type = "strict " + graph_type
+    edge_op = " -> " if G.is_directed() else " -- "
+    lines.append(graph_type + " {")
+    for n, d in G.nodes(data=True):
+        lines.append(_quote(n) + _attrs(d) + ";")
+    if G.is_multigraph():
+        for u, v, k, d in G.edges(keys=True, data=True):
+            a = {"key": k}
+            a.update(d)
+            lines.append(_quote(u) + edge_op + _quote(v) + _attrs(a) + ";")
+    else:
+        for u, v, d in G.edges(data=True):
+            lines.append(_quote(u) + edge_op + _quote(v) + _attrs(d) + ";")
+    lines.append("}")
+    return "\n".join(lines) + "\n"
+
+
+def write_dot(G, path):
+    ''' Write the DOT representation of graph G to path '''
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(to_dot(G))
@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+"""
+Intro
+=====
+Lexical lookup on forms produced by the Paninian generator
+
+Forms generated for a list of pratipadikas (see
+sanskrit_parser.generator.lexicon) are stored as a gzipped table of
+``form<TAB>stem<TAB>tag,tag,...`` lines, in SLP1, with tags in the same
+(devanagari) vocabulary as the other lexical lookups. The table is read
+into memory on load, so it fills coverage gaps in the inria and
+sanskrit_data lookups without a database import.
+
+The combined lookup includes generated forms if the table exists, at
+``SANSKRIT_PARSER_GENERATED_FORMS``, or at generated_forms.tsv.gz in the
+package data directory.
+
+Usage
+=====
+
+.. code:: python
+
+    >>> from sanskrit_parser.util.lexical_lookup_factory import LexicalLookupFactory
+    >>> db = LexicalLookupFactory.create("generated")
+    >>> db.get_tags('rAmAt')
+    [(rAma, {पञ्चमीविभक्तिः, एकवचनम्, पुंल्लिङ्गम्})]
+
+Command line usage
+==================
+
+::
+
+    $ sanskrit_parser generator stems.txt --output generated_forms.tsv.gz
+    $ python -m sanskrit_parser.util.generated_forms rAmAt
+
+"""
+
+import gzip
+import logging
+import os
+
+from indic_transliteration import sanscript
+from sanskrit_parser.base.sanskrit_base import SanskritImmutableString
+from sanskrit_parser.util.lexical_lookup import LexicalLookup
+from sanskrit_parser.util.data_manager import data_file_path
+
+HEADER = "# sanskrit_parser generated forms v1"
+
+
+def default_path():
+    ''' Path of the generated forms table used by the lexical lookups '''
+    return (os.environ.get("SANSKRIT_PARSER_GENERATED_FORMS")
+            or data_file_path("generated_forms.tsv.gz"))
+
+
+def write_forms(path, rows):
+    '''
+    Write a generated forms table
+
+    Rows are written as they are produced, and the table replaces path
+    once complete
+    Inputs:
+      path: Output file
+      rows: iterable of (form, stem, tags)
+    Outputs
+      Number of rows written
+    '''
+    n = 0
+    tmp = f"{path}.{os.getpid()}"
+    try:
+        with gzip.open(tmp, "wt", encoding="utf-8") as f:
+            f.write(HEADER + "\n")
+            for form, stem, tags in rows:
+                f.write(f"{form}\t{stem}\t{','.join(tags)}\n")
+                n += 1
+        os.replace(tmp, path)
+    except BaseException:
+        # eg: a worker failed. path is left as it was
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    return n
+
+
+def read_forms(path):
+    '''
+    Read a generated forms table
+
+    Outputs
+      dict of form -> list of (stem, tuple of tags)
+    Raises
+      ValueError if path is not a generated forms table
+    '''
+    forms = {}
+    # Tag tuples are shared between forms
+    tagsets = {}
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        if f.readline().rstrip("\n") != HEADER:
+            raise ValueError(f"{path} is not a generated forms table")
+        for line in f:
+            form, stem, tags = line.rstrip("\n").split("\t")
+            t = tagsets.get(tags)
+            if t is None:
+                t = tagsets[tags] = tuple(tags.split(","))
+            forms.setdefault(form, []).append((stem, t))
+    return forms
+
+
+class GeneratedFormsWrapper(LexicalLookup):
+    """
+    Lexical lookup on a generated forms table
+
+    Params:
+        path(str): Generated forms table (def=default_path())
+    """
+
+    def __init__(self, path=None, logger=None):
+        self.path = path or default_path()
+        self.logger = logger or logging.getLogger(__name__)
+        self.forms = read_forms(self.path)
+        self.logger.info(f"Loaded {len(self.forms)} generated forms from {self.path}")
+
+    def valid(self, word):
+        return word in self.forms
+
+    def get_tags(self, word, tmap=True):
+        entries = self.forms.get(word)
+        if entries is None:
+            return None
+        if not tmap:
+            return [(stem, set(tags)) for stem, tags in entries]
+        return [(SanskritImmutableString(stem, sanscript.SLP1),
+                 set(SanskritImmutableString(t, sanscript.DEVANAGARI) for t in tags))
+                for stem, tags in entries]
+
+
+if __name__ == "__main__":
+    args = LexicalLookup.getArgs()
+    if args.loglevel:
+        numeric_level = getattr(logging, args.loglevel.upper(), None)
+        if not isinstance(numeric_level, int):
+            raise ValueError('Invalid log level: %s' % args.loglevel)
+        logging.basicConfig(level=numeric_level)
+    GeneratedFormsWrapper().main(args)
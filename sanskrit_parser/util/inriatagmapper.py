@@ -8,7 +8,7 @@ Map tags generated by inriaxmlwrapper to a better set of names
 
 from __future__ import print_function
 from indic_transliteration import sanscript
-from sanskrit_parser.base.sanskrit_base import SanskritImmutableString
+from sanskrit_parser.base.sanskrit_base import SanskritImmutableString, register_vocabulary
 
 inriatags = [('prim', 'प्राथमिकः'),
              ('ca', 'णिजन्तः'),
@@ -103,6 +103,7 @@ def _inriaTagsToDb(tag):
 
 
 inriatagdb = list(map(_inriaTagsToDb, inriatags))
+register_vocabulary(set(t[1].thing for t in inriatagdb))
 
 
 def inriaMapTag(tag):
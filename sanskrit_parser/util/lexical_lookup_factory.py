@@ -4,10 +4,9 @@ Created on Aug 4, 2017
 @author: alvarna
 '''
 
-from sanskrit_parser.util.inriaxmlwrapper import InriaXMLWrapper
-from sanskrit_parser.util.sanskrit_data_wrapper import SanskritDataWrapper
 from sanskrit_parser.util.lexical_lookup import LexicalLookup
 import logging
+import os
 
 
 def _merge_tags(tags):
@@ -53,16 +52,25 @@ class CombinedWrapper(LexicalLookup):
     def __init__(self, logger=None):
         self.inria = LexicalLookupFactory.create("inria")
         self.sanskrit_data = LexicalLookupFactory.create("sanskrit_data")
+        # Generated forms fill gaps in the others, if they have been generated
+        from sanskrit_parser.util.generated_forms import default_path
+        if os.path.exists(default_path()):
+            self.generated = LexicalLookupFactory.create("generated")
+        else:
+            self.generated = None
         self.logger = logger or logging.getLogger(__name__)
 
     def valid(self, word):
-        return self.inria.valid(word) or self.sanskrit_data.valid(word)
+        return (self.inria.valid(word) or self.sanskrit_data.valid(word)
+                or (self.generated is not None and self.generated.valid(word)))
 
     def get_tags(self, word, tmap=True):
         tags = self.inria.get_tags(word, tmap) or []
         sanskrit_data_tags = self.sanskrit_data.get_tags(word, tmap)
         if sanskrit_data_tags is not None:
             tags.extend(sanskrit_data_tags)
+        if self.generated is not None:
+            tags.extend(self.generated.get_tags(word, tmap) or [])
         tags = _merge_tags(tags)
         if tags == []:
             return None
@@ -74,10 +82,16 @@ class LexicalLookupFactory(object):
 
     @staticmethod
     def create(name):
+        # Backends are imported on first use, as sanskrit_data pulls in sqlalchemy
         if name == "inria":
+            from sanskrit_parser.util.inriaxmlwrapper import InriaXMLWrapper
             return InriaXMLWrapper()
         if name == "sanskrit_data":
+            from sanskrit_parser.util.sanskrit_data_wrapper import SanskritDataWrapper
             return SanskritDataWrapper()
+        if name == "generated":
+            from sanskrit_parser.util.generated_forms import GeneratedFormsWrapper
+            return GeneratedFormsWrapper()
         if name == "combined":
             return CombinedWrapper()
         raise Exception("invalid type", name)
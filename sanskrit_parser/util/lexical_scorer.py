@@ -11,45 +11,66 @@ Requires sentencepiece to be installed
 
 import sys
 import logging
+import threading
 
 from sanskrit_parser.util.data_manager import data_file_path
 
-try:
-    import sentencepiece as spm
-    import gensim
-    gensim_enabled = True
-except ImportError:
-    msg = 'gensim and/or sentencepiece not found. '
-    msg += 'Lexical scoring will be disabled\n'
-    msg += 'To enable scoring please install gensim and sentencepiece'
-    logging.warning(msg)
-    gensim_enabled = False
+sentencepiece_file = "sentencepiece.model"
+word2vec_file = "word2vec_model.dat"
+# (sentencepiece processor, word2vec model), or None if scoring is disabled.
+# Loaded on first use, and shared by all Scorers
+_models = None
+_loaded = False
+_load_lock = threading.Lock()
 
 
-class Scorer(object):
+def load_models():
+    ''' Import gensim and sentencepiece, and load the models
+
+        Returns:
+            (sentencepiece processor, word2vec model), or None if
+            gensim and/or sentencepiece are not installed
+    '''
+    global _models, _loaded
+    if _loaded:
+        return _models
+    with _load_lock:
+        if _loaded:
+            return _models
+        try:
+            import sentencepiece as spm
+            import gensim
+        except ImportError:
+            msg = 'gensim and/or sentencepiece not found. '
+            msg += 'Lexical scoring will be disabled\n'
+            msg += 'To enable scoring please install gensim and sentencepiece'
+            logging.warning(msg)
+        else:
+            sp = spm.SentencePieceProcessor()
+            sp.Load(data_file_path(sentencepiece_file))
+            model = gensim.models.Word2Vec.load(data_file_path(word2vec_file))
+            _models = (sp, model)
+        _loaded = True
+    return _models
 
-    sentencepiece_file = "sentencepiece.model"
-    word2vec_file = "word2vec_model.dat"
+
+class Scorer(object):
 
     def __init__(self):
         self.logger = logging.getLogger(__name__)
-        if gensim_enabled:
-            self.sentencepiece_file = data_file_path(self.sentencepiece_file)
-            self.sp = spm.SentencePieceProcessor()
-            self.sp.Load(self.sentencepiece_file)
-            self.word2vec_file = data_file_path(self.word2vec_file)
-            self.model = gensim.models.Word2Vec.load(self.word2vec_file)
 
     def score_splits(self, splits):
         sentences = [" ".join(map(str, split)) for split in splits]
         return self.score_strings(sentences)
 
     def score_strings(self, sentences):
-        if gensim_enabled:
+        models = load_models()
+        if models is not None:
+            sp, model = models
             self.logger.debug("Sentence = %s", sentences)
-            pieces = [self.sp.EncodeAsPieces(sentence) for sentence in sentences]
+            pieces = [sp.EncodeAsPieces(sentence) for sentence in sentences]
             self.logger.debug("Pieces = %s", pieces)
-            scores = self.model.score(pieces, total_sentences=len(sentences))
+            scores = model.score(pieces, total_sentences=len(sentences))
             self.logger.debug("Score = %s", scores)
         else:
             # Use negative of length.
@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+'''
+Operational metrics for the parsing pipeline
+
+Pipeline stages report their latency here, and lexical lookups report
+cache hits and misses. Everything is labelled with the labels of the
+current context (eg: endpoint, input length bucket), which callers set
+with ``labels()``. Metrics can be rendered in the Prometheus text
+exposition format, so both the REST API and batch jobs can export them.
+
+Usage
+=====
+
+.. code:: python
+
+    >>> from sanskrit_parser.util import metrics
+    >>> with metrics.labels(endpoint="batch", input_length=len(line)):
+    ...     splits = analyzer.getSandhiSplits(SanskritObject(line))
+    >>> metrics.write_textfile("sanskrit_parser.prom")
+
+'''
+
+import bisect
+import contextvars
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+# Histogram bucket upper bounds, in seconds
+BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1,
+           0.25, 0.5, 1, 2.5, 5, 10)
+# Input length bucket upper bounds, in characters
+LENGTH_BUCKETS = (16, 32, 64, 128)
+PREFIX = "sanskrit_parser_"
+
+_labels = contextvars.ContextVar("sanskrit_parser_metric_labels", default=())
+_lock = threading.Lock()
+# (name, labels) -> value
+_counters = defaultdict(float)
+# (name, labels) -> [bucket counts..., sum, count]
+_histograms = {}
+
+
+def length_bucket(n):
+    ''' Label value for an input of length n '''
+    ix = bisect.bisect_left(LENGTH_BUCKETS, n)
+    if ix == len(LENGTH_BUCKETS):
+        return f"gt{LENGTH_BUCKETS[-1]}"
+    return f"le{LENGTH_BUCKETS[ix]}"
+
+
+def set_labels(endpoint=None, input_length=None, **kwargs):
+    ''' Add labels to metrics recorded from now on in this context
+
+        Params:
+            endpoint(str): Endpoint, or job, that is being served
+            input_length(int): Length of the input, bucketed
+            kwargs: Other labels
+        Returns:
+            token for reset_labels
+    '''
+    d = dict(_labels.get())
+    if endpoint is not None:
+        d["endpoint"] = endpoint
+    if input_length is not None:
+        d["input_length"] = length_bucket(input_length)
+    d.update(kwargs)
+    return _labels.set(tuple(sorted(d.items())))
+
+
+def reset_labels(token):
+    ''' Restore the labels in effect before set_labels returned token '''
+    _labels.reset(token)
+
+
+@contextmanager
+def labels(endpoint=None, input_length=None, **kwargs):
+    ''' Label metrics recorded in this context (see set_labels) '''
+    token = set_labels(endpoint, input_length, **kwargs)
+    try:
+        yield
+    finally:
+        reset_labels(token)
+
+
+def inc(name, value=1, **kwargs):
+    ''' Increment counter name, labelled with context labels plus kwargs '''
+    key = (name, _labels.get() + tuple(sorted(kwargs.items())))
+    with _lock:
+        _counters[key] += value
+
+
+def observe(name, value, **kwargs):
+    ''' Add value to histogram name, labelled with context labels plus kwargs '''
+    key = (name, _labels.get() + tuple(sorted(kwargs.items())))
+    ix = bisect.bisect_left(BUCKETS, value)
+    with _lock:
+        h = _histograms.get(key)
+        if h is None:
+            h = _histograms[key] = [0] * (len(BUCKETS) + 2)
+        if ix < len(BUCKETS):
+            h[ix] += 1
+        h[-2] += value
+        h[-1] += 1
+
+
+@contextmanager
+def timed(stage):
+    ''' Record the time spent in a pipeline stage '''
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe("stage_seconds", time.perf_counter() - start, stage=stage)
+
+
+def _fmt_labels(lbls):
+    if not lbls:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in lbls) + "}"
+
+
+def render():
+    ''' Return all metrics in the Prometheus text exposition format '''
+    lines = []
+    with _lock:
+        counters = sorted(_counters.items())
+        histograms = sorted((k, list(v)) for k, v in _histograms.items())
+    seen = set()
+    for (name, lbls), value in counters:
+        if name not in seen:
+            seen.add(name)
+            lines.append(f"# TYPE {PREFIX}{name} counter")
+        lines.append(f"{PREFIX}{name}{_fmt_labels(lbls)} {value}")
+    for (name, lbls), h in histograms:
+        if name not in seen:
+            seen.add(name)
+            lines.append(f"# TYPE {PREFIX}{name} histogram")
+        cumulative = 0
+        for le, count in zip(BUCKETS, h):
+            cumulative += count
+            lines.append(f"{PREFIX}{name}_bucket{_fmt_labels(lbls + (('le', le),))} {cumulative}")
+        lines.append(f"{PREFIX}{name}_bucket{_fmt_labels(lbls + (('le', '+Inf'),))} {h[-1]}")
+        lines.append(f"{PREFIX}{name}_sum{_fmt_labels(lbls)} {h[-2]}")
+        lines.append(f"{PREFIX}{name}_count{_fmt_labels(lbls)} {h[-1]}")
+    return "\n".join(lines) + "\n"
+
+
+def write_textfile(path):
+    ''' Write metrics to path, eg: for the node_exporter textfile collector '''
+    with open(path, "w") as f:
+        f.write(render())
+
+
+def reset():
+    ''' Clear all recorded metrics '''
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
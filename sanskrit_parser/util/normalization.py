@@ -11,37 +11,91 @@ import logging
 
 logger = logging.getLogger(__name__)
 
-deletions = re.compile("[\u200b\u200c\u200d,'-;/().?!\"0123456789{}#\r]")
+# Unicode Zero-Width characters, punctuation and numeric characters
+_deletions = "\u200b\u200c\u200d,'()*+-./0123456789;?!\"{}#\r"
+# Single character edits, applied in one str.translate pass
+_table = str.maketrans(dict({c: None for c in _deletions},
+                            **{':': 'H',    # Some bad visargas
+                               '\n': ' '}))  # Replace line-breaks with spaces
+# FIXME - temporary changes to handle ISO5519 as pseudo-IAST
+# Remove once we have a full ISO5519 implementation in indic_transliterate
+_iso = {'ṁ': 'M', 'r̥̄': 'F', 'r̥': 'f', 'l̥': 'x'}
+_iso_re = re.compile("|".join(_iso))
+# Nasal replacing a lazy anusvAra before a consonant
+_anusvara = dict({c: 'N' for c in 'kKgGN'},
+                 **{c: 'Y' for c in 'cCjJY'},
+                 **{c: 'R' for c in 'wWqQR'},
+                 **{c: 'n' for c in 'tTdDn'},
+                 **{c: 'm' for c in 'pPbBm'},
+                 **{c: c + '~' for c in 'ylv'})
+# One pass for the ISO5519 sequences, lazy anusvAras before consonants
+# (see issue #103) and runs of whitespace between words
+_input_re = re.compile("[Mṁ](?=(?P<c>[" + "".join(_anusvara) + "])(?!\u0325))"
+                       "|" + "|".join(_iso) +
+                       "|(?<=\\S)(?P<sp>\\s{2,}|[^\\S ])(?=\\S)")
 
 
-def normalize(s):
-    """ Converts user-input into format expected by internal modules.
-    Input s is expected to be an SLP1 encoded string
-    """
-    # Some bad visargas
-    s = s.replace(':', 'H')
-    # Remove Unicode Zero-Width characters, punctuation and numeric characters
-    s = deletions.sub("", s)
-    # Replace line-breaks with spaces
-    s = s.replace('\n', ' ')
-    if s[-1] == 'M':
+def _ending(s):
+    if s[-1:] == 'M':
         logger.debug("Detected anusvAra at end of string. Replacing with m")
         s = s[:-1] + 'm'
-    if s[-1] == 'o':
+    if s[-1:] == 'o':
         logger.debug("Detected o at end of string. Replacing with aH")
         s = s[:-1] + 'aH'
-    # FIXME - temporary changes to handle ISO5519 as pseudo-IAST
-    # Remove once we have a full ISO5519 implementation in indic_transliterate
-    s = s.replace('ṁ', 'M')
-    s = s.replace('r̥', 'f')
-    s = s.replace('r̥̄', 'F')
-    s = s.replace('l̥', 'x')
     return s
 
 
+def normalize(s):
+    """ Converts user-input into format expected by internal modules.
+    Input s is expected to be an SLP1 encoded string
+    """
+    s = _ending(s.translate(_table))
+    return _iso_re.sub(lambda m: _iso[m.group(0)], s)
+
+
+def _input_sub(m):
+    if m.group('sp') is not None:
+        return ' '
+    c = m.group('c')
+    if c is not None:
+        return _anusvara[c]
+    return _iso[m.group(0)]
+
+
+def normalize_input(s, replace_ending_visarga='s'):
+    """ Full normalization of user-input, as done by SanskritNormalizedString
+
+    normalize, followed by replacement of the ending visarga, and fixing of
+    lazy anusvAras within words
+    Params:
+        s(str): SLP1 encoded string
+        replace_ending_visarga(str): 's', 'r', or None to leave it alone
+    Returns:
+        str: normalized string
+    """
+    s = _ending(s.translate(_table))
+    if replace_ending_visarga == 's':
+        s = replace_ending_visarga_s(s)
+    elif replace_ending_visarga == 'r':
+        s = replace_ending_visarga_r(s)
+    return _input_re.sub(_input_sub, s)
+
+
+def normalize_many(lines, replace_ending_visarga='s'):
+    """ normalize_input over a batch of lines, eg: from a text being ingested
+
+    Params:
+        lines(iterable): SLP1 encoded strings
+        replace_ending_visarga(str): As for normalize_input
+    Returns:
+        list: normalized strings
+    """
+    return [normalize_input(s, replace_ending_visarga) for s in lines]
+
+
 def replace_ending_visarga_s(s):
     """ Replace the final visarga of a string with s """
-    if (s[-1] == 'H'):
+    if (s[-1:] == 'H'):
         logger.debug("Detected H at end of string. Replacing with s")
         s = s[:-1] + 's'
     return s
@@ -49,7 +103,7 @@ def replace_ending_visarga_s(s):
 
 def replace_ending_visarga_r(s):
     """ Replace the final visarga of a string with r """
-    if (s[-1] == 'H'):
+    if (s[-1:] == 'H'):
         logger.debug("Detected H at end of string. Replacing with s")
         s = s[:-1] + 'r'
     return s
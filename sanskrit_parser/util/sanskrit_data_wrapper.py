@@ -11,7 +11,7 @@ import sanskrit_util.analyze
 import sanskrit_util.context
 from sanskrit_util.schema import Nominal, Indeclinable, Verb, Gerund, Infinitive, ParticipleStem
 from sanskrit_parser.util.lexical_lookup import LexicalLookup
-from sanskrit_parser.base.sanskrit_base import SanskritImmutableString
+from sanskrit_parser.base.sanskrit_base import SanskritImmutableString, register_vocabulary
 from indic_transliteration import sanscript
 from sanskrit_parser.util.data_manager import data_file_path
 
@@ -142,6 +142,13 @@ class SanskritDataWrapper(LexicalLookup):
         return out
 
 
+register_vocabulary(SanskritImmutableString(t, sanscript.DEVANAGARI).thing
+                    for t in (SanskritDataWrapper.vacanam + SanskritDataWrapper.lingam
+                              + SanskritDataWrapper.vibhakti + SanskritDataWrapper.lakAra
+                              + SanskritDataWrapper.pada_prayoga + SanskritDataWrapper.puruSha
+                              + ['समासपूर्वपदनामपदम्']))
+
+
 if __name__ == "__main__":
     args = LexicalLookup.getArgs()
     if args.loglevel:
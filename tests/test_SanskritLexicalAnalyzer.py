@@ -73,6 +73,30 @@ def test_medium_split(lexan):
            [list(map(str, ss)) for ss in splits]
 
 
+def test_split_memo(lexan):
+    memo_lexan = LexicalSandhiAnalyzer(split_memo_size=64)
+    inputs = ["budDaMSaraRaNgacCAmi", "SaraRaNgacCAmi", "gaReSannamAmi", "budDaMSaraRaNgacCAmi"]
+    for s in inputs:
+        i = SanskritObject(s, encoding=sanscript.SLP1)
+        expected = sorted(list(map(str, ss)) for ss in lexan.getSandhiSplits(i).find_all_paths(max_paths=10000, score=False))
+        i = SanskritObject(s, encoding=sanscript.SLP1)
+        splits = sorted(list(map(str, ss)) for ss in memo_lexan.getSandhiSplits(i).find_all_paths(max_paths=10000, score=False))
+        assert splits == expected
+    assert 0 < len(memo_lexan.split_memo) <= 64
+
+
+def test_concurrent_splits(lexan):
+    from concurrent.futures import ThreadPoolExecutor
+    inputs = ["budDaMSaraRaNgacCAmi", "gaReSannamAmi", "SaraRaNgacCAmi", "rAmovanaNgacCati"] * 4
+
+    def _splits(s):
+        g = lexan.getSandhiSplits(SanskritObject(s, encoding=sanscript.SLP1))
+        return sorted(list(map(str, ss)) for ss in g.find_all_paths(max_paths=10000, score=False))
+    expected = [_splits(s) for s in inputs]
+    with ThreadPoolExecutor(max_workers=4) as ex:
+        assert list(ex.map(_splits, inputs)) == expected
+
+
 # def test_file_splits(lexan, splittext_refs):
 #     f = splittext_refs[0]
 #     s = splittext_refs[1]
@@ -0,0 +1,33 @@
+"""
+DOT output must stay valid for any node names and attribute values
+"""
+import networkx as nx
+import pytest
+
+from sanskrit_parser.util import dot
+
+
+def test_quote():
+    assert dot._quote('a"b') == '"a\\"b"'
+    assert dot._quote('a\\b') == '"a\\\\b"'
+    assert dot._quote('a\\"b') == '"a\\\\\\"b"'
+    assert dot._quote('a\nb') == '"a\\nb"'
+
+
+def test_to_dot():
+    G = nx.MultiDiGraph()
+    G.add_edge('rAma\\', 'va"na\nm', label='karma')
+    assert dot.to_dot(G) == ('digraph {\n'
+                             '"rAma\\\\";\n'
+                             '"va\\"na\\nm";\n'
+                             '"rAma\\\\" -> "va\\"na\\nm" [key="0", label="karma"];\n'
+                             '}\n')
+
+
+def test_parses():
+    pydot = pytest.importorskip("pydot")
+    G = nx.DiGraph()
+    G.add_edge('a\\', 'b"\nc', label='x\\"y')
+    g = pydot.graph_from_dot_data(dot.to_dot(G))[0]
+    assert len(g.get_edges()) == 1
+    assert len(g.get_nodes()) == 2
@@ -0,0 +1,66 @@
+"""
+Forms written by the generator must be loadable as a lexical lookup
+"""
+import os
+
+import pytest
+
+from indic_transliteration import sanscript
+
+from sanskrit_parser.base.sanskrit_base import SanskritImmutableString
+from sanskrit_parser.generator.lexicon import read_pratipadikas, write_lexicon
+from sanskrit_parser.util.generated_forms import read_forms, write_forms
+from sanskrit_parser.util.lexical_lookup_factory import LexicalLookupFactory
+
+
+def test_roundtrip(tmp_path):
+    rows = [('rAmas', 'rAma', ('a', 'b')), ('rAmO', 'rAma', ('a', 'c')), ('rAmas', 'rAmA', ('a', 'b'))]
+    path = str(tmp_path / 'forms.tsv.gz')
+    assert write_forms(path, iter(rows)) == 3
+    assert read_forms(path) == {'rAmas': [('rAma', ('a', 'b')), ('rAmA', ('a', 'b'))],
+                                'rAmO': [('rAma', ('a', 'c'))]}
+
+
+def test_failed_write(tmp_path):
+    path = tmp_path / 'forms.tsv.gz'
+    write_forms(str(path), [('rAmas', 'rAma', ('a', 'b'))])
+
+    def rows():
+        yield ('rAmO', 'rAma', ('a', 'c'))
+        raise RuntimeError("worker failed")
+    with pytest.raises(RuntimeError):
+        write_forms(str(path), rows())
+    # The temporary file is removed, and the old table kept
+    assert os.listdir(tmp_path) == ['forms.tsv.gz']
+    assert read_forms(str(path)) == {'rAmas': [('rAma', ('a', 'b'))]}
+
+
+def test_bad_file(tmp_path):
+    path = tmp_path / 'forms.tsv.gz'
+    path.write_bytes(b'')
+    with pytest.raises(ValueError):
+        read_forms(str(path))
+
+
+def test_read_pratipadikas():
+    ps = list(read_pratipadikas(["# stem linga tags", "", "rAma pum", "ramA strI Ap"]))
+    assert [(p.canonical(), p.linga) for p in ps] == [('rAma', 'pum'), ('ramA', 'strI')]
+    assert ps[1].hasTag("Ap")
+    with pytest.raises(ValueError):
+        list(read_pratipadikas(["rAma"]))
+
+
+def test_generated_lookup(tmp_path, monkeypatch):
+    path = str(tmp_path / 'forms.tsv.gz')
+    write_lexicon(read_pratipadikas(["rAma pum"]), path, processes=1)
+    monkeypatch.setenv("SANSKRIT_PARSER_GENERATED_FORMS", path)
+    db = LexicalLookupFactory.create("generated")
+    assert db.valid('rAmas')
+    assert not db.valid('rAmaH')
+    assert db.get_tags('rAmAt', tmap=False) == [('rAma', {'पञ्चमीविभक्तिः', 'एकवचनम्', 'पुंल्लिङ्गम्'})]
+    tags = db.get_tags('rAmAt')
+    assert tags == [(SanskritImmutableString('rAma', sanscript.SLP1),
+                     {SanskritImmutableString(t, sanscript.DEVANAGARI)
+                      for t in ['पञ्चमीविभक्तिः', 'एकवचनम्', 'पुंल्लिङ्गम्']})]
+    # praTamA, dvitIyA and samboDana dvivacana
+    assert len(db.get_tags('rAmO')) == 3
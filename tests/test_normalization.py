@@ -0,0 +1,49 @@
+"""
+Normalization of user input, as done by SanskritNormalizedString
+"""
+import pytest
+
+from sanskrit_parser.util.normalization import normalize_input, normalize_many
+
+
+@pytest.mark.parametrize("s, expected", [
+    ("rAmaH", "rAmas"),
+    ("rAmo", "rAmas"),
+    ("vanaM", "vanam"),
+    # Bad visarga, punctuation and digits
+    ("rAma:", "rAmas"),
+    ("gacCati,", "gacCati"),
+    ("a\u200bsti 1.2", "asti "),
+    # Lazy anusvAras
+    ("aMkaH", "aNkas"),
+    ("saMcayaH", "saYcayas"),
+    ("saMtoza", "santoza"),
+    ("saMvatsaraH", "sav~vatsaras"),
+    ("saMSayaH", "saMSayas"),
+    # Whitespace between words
+    ("asti\n  uttarasyAm", "asti uttarasyAm"),
+    ("rAmaH  vanam", "rAmaH vanam"),
+    # ISO5519
+    ("kr̥ta", "kfta"),
+    ("pitr̥̄n", "pitFn"),
+    # Empty, before or after deletions, and whitespace only
+    ("", ""),
+    ("..", ""),
+    ("   ", "   "),
+    (" \t", " \t"),
+])
+def test_normalize_input(s, expected):
+    assert normalize_input(s) == expected
+
+
+def test_ending_visarga():
+    assert normalize_input("rAmaH", "r") == "rAmar"
+    assert normalize_input("rAmaH", None) == "rAmaH"
+    assert normalize_input("", "r") == ""
+
+
+def test_normalize_many():
+    lines = ["rAmaH", "", "saMcayaH", " "]
+    assert normalize_many(lines) == ["rAmas", "", "saYcayas", " "]
+    assert normalize_many(iter(lines), None) == ["rAmaH", "", "saYcayaH", " "]
+    assert normalize_many([]) == []
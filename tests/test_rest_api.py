@@ -10,7 +10,8 @@ import logging
 import pytest
 import json
 
-from sanskrit_parser.rest_api import run
+from sanskrit_parser.rest_api import api_v1, run
+from sanskrit_parser.util import metrics
 
 logging.basicConfig(
     level=logging.DEBUG,
@@ -39,3 +40,111 @@ def test_splits(app_fixture):
     split = json.loads(response.data)
     logging.debug(str(split))
     assert len(split["splits"]) > 0
+
+
+def test_batch_tags(app_fixture):
+    url = "/sanskrit_parser/v1/batch/tags"
+    response = app_fixture.post(url, json=["hares", "gacCati"])
+    tags = json.loads(response.data)
+    logging.debug(str(tags))
+    assert [t["input"] for t in tags] == ["hares", "gacCati"]
+    assert all(len(t["tags"]) > 0 for t in tags)
+
+
+def test_batch_splits_stream(app_fixture):
+    url = "/sanskrit_parser/v1/batch/splits?stream=true&workers=2"
+    response = app_fixture.post(url, json=["astyuttarasyAm", "gaReSannamAmi"])
+    assert response.mimetype == "application/x-ndjson"
+    splits = [json.loads(line) for line in response.data.decode("utf-8").splitlines()]
+    assert [s["input"] for s in splits] == ["astyuttarasyAm", "gaReSannamAmi"]
+    assert all(len(s["splits"]) > 0 for s in splits)
+
+
+def test_batch_bad_input(app_fixture):
+    url = "/sanskrit_parser/v1/batch/tags"
+    response = app_fixture.post(url, json={"words": ["hares"]})
+    assert response.status_code == 400
+
+
+def test_cache_headers(app_fixture):
+    url = "/sanskrit_parser/v1/tags/hares"
+    response = app_fixture.get(url)
+    assert response.status_code == 200
+    assert "max-age" in response.headers["Cache-Control"]
+    tag = response.headers["ETag"]
+    response = app_fixture.get(url, headers={"If-None-Match": tag})
+    assert response.status_code == 304
+
+
+def test_response_cache(tmp_path):
+    from sanskrit_parser.rest_api.response_cache import ResponseCache
+    db_file = str(tmp_path / "responses.db")
+    cache = ResponseCache(maxsize=2, db_file=db_file)
+    cache.put("a", {"tags": [1]})
+    cache.put("b", {"tags": [2]})
+    assert cache.get("a") == {"tags": [1]}
+    cache.put("c", {"tags": [3]})
+    assert len(cache) == 2
+    # Least recently used evicted from memory, still on disk
+    assert cache.get("b") == {"tags": [2]}
+    # Oldest inserted dropped from disk
+    other = ResponseCache(maxsize=2, db_file=db_file)
+    assert other.get("a") is None
+    assert other.get("c") == {"tags": [3]}
+    assert cache.get("d") is None
+
+
+def test_splits_stream(app_fixture):
+    url = "/sanskrit_parser/v1/splits/astyuttarasyAm?stream=sse"
+    response = app_fixture.get(url)
+    assert response.mimetype == "text/event-stream"
+    events = [json.loads(e[len("data: "):]) for e in response.data.decode("utf-8").split("\n\n") if e]
+    assert events[0]["input"] == "astyuttarasyAm"
+    assert len(events) > 1
+    assert all("split" in e for e in events[1:])
+
+
+def test_analyses_stream(app_fixture):
+    url = "/sanskrit_parser/v1/parse-presegmented/asti uttarasyAm?stream=ndjson&dot=true"
+    response = app_fixture.get(url)
+    records = [json.loads(line) for line in response.data.decode("utf-8").splitlines()]
+    assert "split_dot" in records[1]
+    assert len([r for r in records if "analysis" in r]) > 0
+    assert all("parse_dot" in r for r in records if "analysis" in r)
+
+
+def test_analyses_dot(app_fixture):
+    url = "/sanskrit_parser/v1/parse-presegmented/asti uttarasyAm"
+    analysis = json.loads(app_fixture.get(url).data)
+    assert "split_dot" not in analysis
+    analysis = json.loads(app_fixture.get(url + "?dot=true").data)
+    assert analysis["split_dot"].startswith("digraph {")
+    assert len(analysis["parse_dots"]) == len(analysis["analysis"])
+
+
+def _metrics_text(app_fixture):
+    return app_fixture.get("/metrics").data.decode("utf-8")
+
+
+def test_metrics(app_fixture):
+    metrics.reset()
+    api_v1.response_cache.clear()
+    app_fixture.get("/sanskrit_parser/v1/splits/budDaMSaraRaNgacCAmi")
+    text = _metrics_text(app_fixture)
+    assert 'sanskrit_parser_stage_seconds_count{endpoint="splits",input_length="le32",stage="sandhi_splits"} 1' in text
+    assert 'sanskrit_parser_lexical_lookups_total{endpoint="splits",input_length="le32",result=' in text
+    # Everything recorded during the request is labelled with its endpoint
+    assert 'sanskrit_parser_lexical_lookups_total{input_length' not in text
+
+
+def test_metrics_stream(app_fixture):
+    metrics.reset()
+    api_v1.response_cache.clear()
+    app_fixture.get("/sanskrit_parser/v1/splits/gaReSannamAmi?stream=ndjson").data
+    app_fixture.post("/sanskrit_parser/v1/batch/splits?workers=2&stream=ndjson",
+                     json=["budDaMSaraRaNgacCAmi", "astyuttarasyAm"]).data
+    text = _metrics_text(app_fixture)
+    assert 'sanskrit_parser_stage_seconds_count{endpoint="splits",input_length="le16",stage="sandhi_splits"} 1' in text
+    assert 'sanskrit_parser_stage_seconds_count{endpoint="batch_splits",input_length="le32",stage="sandhi_splits"}' in text
+    assert 'sanskrit_parser_stage_seconds_count{input_length' not in text
+    assert 'sanskrit_parser_lexical_lookups_total{input_length' not in text
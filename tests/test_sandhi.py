@@ -5,6 +5,7 @@ Created on Jul 7, 2017
 """
 import pytest
 import codecs
+import itertools
 import os
 import inspect
 import logging
@@ -37,6 +38,20 @@ def test_sandhi_split(sandhiobj, split_reference):
     assert expected in splits, u"Split, {}, {}, {}, {}".format(*split_reference)
 
 
+def test_sandhi_join_many(sandhiobj):
+    firsts = ['te', 'rAmaH', 'tat', 'vane']
+    seconds = ['eva', 'gacCati', 'api']
+    pairs = [(f, s) for f in firsts for s in seconds]
+    expected = [sandhiobj.join(SanskritImmutableString(f, encoding=sanscript.SLP1),
+                               SanskritImmutableString(s, encoding=sanscript.SLP1))
+                for f, s in pairs]
+    assert list(sandhiobj.join_many(pairs)) == expected
+    assert list(sandhiobj.join_product(firsts, seconds)) == list(zip(pairs, expected))
+    # Pairs are joined as they are consumed
+    assert list(itertools.islice(sandhiobj.join_product(itertools.cycle(firsts), seconds), 5)) == \
+        list(zip(pairs, expected))[:5]
+
+
 def load_file(filename, xfail=False):
     references = []
     with codecs.open(filename, "rb", encoding="utf-8") as f:
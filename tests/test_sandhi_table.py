@@ -0,0 +1,105 @@
+"""
+Compiled sandhi rules must agree with the pickled rules they are built from
+"""
+import itertools
+import os
+
+import pytest
+
+from sanskrit_parser.parser.sandhi import Sandhi
+from sanskrit_parser.parser.sandhi_table import SandhiTable, load_table, source_hash, table_file, write_table
+from sanskrit_parser.util.data_manager import data_file_path
+
+
+@pytest.fixture(scope="module")
+def rules():
+    s = Sandhi()
+    s.table = None
+    s._load_forward()
+    s._load_backward()
+    return s
+
+
+@pytest.fixture(scope="module")
+def cache_dir(tmp_path_factory):
+    return str(tmp_path_factory.mktemp("cache"))
+
+
+@pytest.fixture(scope="module")
+def table(cache_dir):
+    return load_table(data_file_path('sandhi_rules.zip'), cache_dir)
+
+
+def test_lengths(rules, table):
+    assert table.lc_len_max == rules.lc_len_max
+    assert table.rc_len_max == rules.rc_len_max
+    assert table.after_len_max == rules.after_len_max
+
+
+def test_forward(rules, table):
+    for key, afters in itertools.islice(rules.forward.items(), 0, None, 97):
+        assert table.forward.get(key) == afters
+    assert table.forward.get(('zz', 'QQ')) is None
+
+
+def test_backward(rules, table):
+    for after, befores in itertools.islice(rules.backward.items(), 0, None, 97):
+        assert table.backward.get(after) == (befores or None)
+    assert table.backward.get('QQQ') is None
+
+
+def test_roundtrip(tmp_path):
+    forward = {('a', 'i'): {('e', 'ach:1')}, ('^a', 'u'): {('o', 'ach:2'), ('a u', 'ach:3')}}
+    backward = {'e': {(('a', 'i'), 'ach:1')}, 'o': {(('^a', 'u'), 'ach:2')},
+                'a u': {(('^a', 'u'), 'ach:3')}}
+    path = str(tmp_path / 'rules.bin')
+    write_table(path, forward, backward)
+    t = SandhiTable(path)
+    for k, v in forward.items():
+        assert t.forward.get(k) == v
+    for k, v in backward.items():
+        assert t.backward.get(k) == v
+    assert (t.lc_len_max, t.rc_len_max, t.after_len_max) == (2, 1, 3)
+    assert t.forward.get(('i', 'a')) is None
+
+
+def test_bad_file(tmp_path):
+    path = tmp_path / 'rules.bin'
+    path.write_bytes(b'\0' * 64)
+    with pytest.raises(ValueError):
+        SandhiTable(str(path))
+
+
+def test_source(tmp_path, cache_dir, table):
+    zip_path = data_file_path('sandhi_rules.zip')
+    source = source_hash(zip_path)
+    assert table.source == source
+    # Built once, then loaded from the cache
+    path = table_file(source, cache_dir)
+    mtime = os.stat(path).st_mtime_ns
+    assert load_table(zip_path, cache_dir).source == source
+    assert os.stat(path).st_mtime_ns == mtime
+    # A table built from other rules is not used
+    with pytest.raises(ValueError):
+        SandhiTable(path, bytes(32))
+    assert table_file(bytes(32), cache_dir) != path
+    assert os.listdir(cache_dir) == [os.path.basename(path)]
+
+
+def test_lazy_load(monkeypatch):
+    loads = []
+    monkeypatch.setattr("sanskrit_parser.parser.sandhi.load_table", lambda p: loads.append(p))
+    s = Sandhi()
+    assert loads == []
+    # Loaded once, with the rules
+    s._load_forward()
+    s._load_backward()
+    assert len(loads) == 1
+
+
+def test_unwritable_cache(tmp_path, monkeypatch):
+    # Fail before unpickling the rules, which Sandhi then unpickles itself
+    monkeypatch.setattr("sanskrit_parser.parser.sandhi_table.os.access", lambda p, m: False)
+    monkeypatch.setattr("sanskrit_parser.parser.sandhi_table.pickle.load", lambda f: pytest.fail("unpickled"))
+    with pytest.raises(OSError):
+        load_table(data_file_path('sandhi_rules.zip'), str(tmp_path))